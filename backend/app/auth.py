@@ -0,0 +1,198 @@
+"""Caller identity from Telegram WebApp ``initData``.
+
+The Mini App sends Telegram's signed ``initData`` in the
+``X-Telegram-Init-Data`` header. :class:`TelegramAuthMiddleware` verifies
+it and stores the caller on ``request.state.telegram_user`` (``None`` for
+requests without the header). A bad signature or a stale ``auth_date`` is
+rejected with 401 before routing.
+
+The same ``initData`` string is sent with every request of a Mini App
+session, so verified identities are kept in a bounded TTL cache keyed by
+the signature. A hit skips the query-string parse, the HMAC and the JSON
+decode. Entries never outlive ``auth_date + TELEGRAM_AUTH_MAX_AGE``.
+
+Routes read the caller through :func:`current_user` and resolve their
+profile through :func:`current_owner`. When there is no header they get the
+default profile, which keeps local development and single-user deployments
+working. Set ``AUTH_REQUIRED=true`` to reject such requests instead.
+"""
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import parse_qsl
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db import get_session
+from app.services.profile import profile_service
+
+
+INIT_DATA_HEADER = "X-Telegram-Init-Data"
+CLOCK_SKEW = 60  # seconds an auth_date may lie in the future
+
+
+class InitDataError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class TelegramUser:
+    id: int
+    auth_date: int
+    username: str | None = None
+    first_name: str | None = None
+    language_code: str | None = None
+
+
+class InitDataVerifier:
+    def __init__(self, token: str, max_age: int, cache_size: int, cache_ttl: float) -> None:
+        # The HMAC key only depends on the bot token, so derive it once.
+        self._secret = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+        self.max_age = max_age
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache: OrderedDict[str, tuple[str, TelegramUser, float]] = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "rejected": 0}
+
+    def verify(self, init_data: str, now: float | None = None) -> TelegramUser:
+        """Returns the signed user; raises :class:`InitDataError` if invalid or stale."""
+        now = time.time() if now is None else now
+        signature = _signature(init_data)
+        cached = self._cache.get(signature) if signature else None
+        if cached is not None:
+            raw, user, expires_at = cached
+            if raw == init_data:
+                if now < expires_at:
+                    self._cache.move_to_end(signature)
+                    self._stats["hits"] += 1
+                    return user
+                del self._cache[signature]
+            # A different payload reusing a cached hash is verified (and
+            # rejected) below without evicting the genuine entry.
+
+        self._stats["misses"] += 1
+        try:
+            user = self._verify(init_data, now)
+        except InitDataError:
+            self._stats["rejected"] += 1
+            raise
+        expires_at = min(now + self.cache_ttl, user.auth_date + self.max_age)
+        self._cache[signature] = (init_data, user, expires_at)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return user
+
+    def _verify(self, init_data: str, now: float) -> TelegramUser:
+        try:
+            fields = dict(parse_qsl(init_data, strict_parsing=True))
+        except ValueError:
+            raise InitDataError("Malformed initData")
+        received = fields.pop("hash", "")
+        check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+        expected = hmac.new(self._secret, check_string.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, received):
+            raise InitDataError("Invalid initData signature")
+
+        try:
+            auth_date = int(fields["auth_date"])
+            user = json.loads(fields["user"])
+            user_id = int(user["id"])
+        except (KeyError, TypeError, ValueError):
+            raise InitDataError("initData has no user")
+        if auth_date < now - self.max_age or auth_date > now + CLOCK_SKEW:
+            raise InitDataError("initData expired")
+        return TelegramUser(
+            id=user_id,
+            auth_date=auth_date,
+            username=user.get("username"),
+            first_name=user.get("first_name"),
+            language_code=user.get("language_code"),
+        )
+
+    def stats(self) -> dict:
+        return {**self._stats, "cached": len(self._cache), "capacity": self.cache_size}
+
+
+def _signature(init_data: str) -> str | None:
+    """The ``hash`` value, found without parsing the whole query string."""
+    for part in init_data.split("&"):
+        if part.startswith("hash="):
+            return part[5:]
+    return None
+
+
+verifier = (
+    InitDataVerifier(
+        settings.telegram_bot_token,
+        max_age=settings.telegram_auth_max_age,
+        cache_size=settings.telegram_auth_cache_size,
+        cache_ttl=settings.telegram_auth_cache_ttl,
+    )
+    if settings.telegram_bot_token
+    else None
+)
+
+
+class TelegramAuthMiddleware:
+    """ASGI middleware attaching the verified Telegram user to ``request.state``."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        user = None
+        init_data = _header(scope, INIT_DATA_HEADER.lower().encode())
+        if init_data and verifier is not None:
+            try:
+                user = verifier.verify(init_data.decode("latin-1"))
+            except InitDataError as exc:
+                await JSONResponse({"detail": str(exc)}, status_code=401)(scope, receive, send)
+                return
+        scope.setdefault("state", {})["telegram_user"] = user
+        await self.app(scope, receive, send)
+
+
+def _header(scope, name: bytes) -> bytes | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def current_user(request: Request) -> TelegramUser | None:
+    """Route dependency returning the verified caller, or ``None`` when anonymous access is allowed."""
+    user = getattr(request.state, "telegram_user", None)
+    if user is None and settings.auth_required:
+        raise HTTPException(status_code=401, detail="Telegram initData required")
+    return user
+
+
+async def current_owner(
+    user: TelegramUser | None = Depends(current_user), session: AsyncSession = Depends(get_session)
+) -> int:
+    """Route dependency returning the caller's profile id."""
+    if user is None:
+        return await profile_service.default_id(session)
+    # In a private chat with the bot the chat id is the user id.
+    return await profile_service.owner_for_chat(session, str(user.id))
+
+
+async def require_default_owner(
+    owner_id: int = Depends(current_owner), session: AsyncSession = Depends(get_session)
+) -> int:
+    """Route dependency for shared data (models, accounts, posting windows, admin alerts).
+
+    Only the default profile, the operator's, may change it; other users get 403.
+    """
+    if owner_id != await profile_service.default_id(session):
+        raise HTTPException(status_code=403, detail="Only the operator can change shared data")
+    return owner_id
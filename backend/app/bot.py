@@ -0,0 +1,304 @@
+"""Outbound Telegram notifications through a persistent outbox.
+
+``send_alert`` writes the message to the ``outbox`` table and returns once
+it is durable; a single dispatcher delivers it. Messages that are still
+pending after a restart are picked up again, and a ``dedupe_key`` makes
+re-sending the same logical alert a no-op.
+
+The dispatcher drains due rows in batches. Consecutive messages for the same
+chat (and deep link) are folded into one Telegram message, and every send
+goes through a token bucket sized to Telegram's global and per-chat limits.
+``TelegramRetryAfter`` pauses the affected buckets for the requested time.
+Other transient failures are retried with jittered exponential backoff,
+up to ``outbox_max_attempts``; permanent errors (bad request, bot blocked)
+fail the message immediately. If the database itself fails (for example
+"database is locked"), the dispatcher logs it and backs off instead of
+stopping. Outcomes of messages that were already delivered are kept and
+recorded before the next batch, so those messages are not sent twice.
+"""
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+    TelegramUnauthorizedError,
+)
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.bot_runner import bot
+from app.config import settings
+from app.db import SessionLocal
+from app.models import OutboxMessage
+from app.services.profile import profile_service
+from app.services.rate_limit import KeyedRateLimiter
+
+
+logger = logging.getLogger(__name__)
+
+PERMANENT_ERRORS = (TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramUnauthorizedError)
+# Telegram caps messages at 4096 characters.
+MAX_MESSAGE_CHARS = 4000
+MAX_IDLE = 300.0
+MAX_ERROR_BACKOFF = 60.0
+
+
+@dataclass
+class _Group:
+    chat_id: str
+    deep_link: str | None
+    ids: list[int] = field(default_factory=list)
+    texts: list[str] = field(default_factory=list)
+    attempts: int = 0
+
+    @property
+    def size(self) -> int:
+        return sum(len(text) + 2 for text in self.texts)
+
+
+def _coalesce(rows) -> list[_Group]:
+    groups: list[_Group] = []
+    open_groups: dict[tuple[str, str | None], _Group] = {}
+    for row in rows:
+        key = (row.chat_id, row.deep_link)
+        group = open_groups.get(key)
+        if group is None or group.size + len(row.text) > MAX_MESSAGE_CHARS:
+            group = open_groups[key] = _Group(row.chat_id, row.deep_link)
+            groups.append(group)
+        group.ids.append(row.id)
+        group.texts.append(row.text)
+        group.attempts = max(group.attempts, row.attempts)
+    return groups
+
+
+def _markup(deep_link: str | None) -> InlineKeyboardMarkup | None:
+    if not deep_link:
+        return None
+    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Open", url=deep_link)]])
+
+
+class TelegramOutbox:
+    def __init__(self) -> None:
+        self.limiter = KeyedRateLimiter(settings.telegram_global_rate, settings.telegram_chat_rate)
+        self._wake = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+        # Outcomes of sends whose status update failed; recorded before the next batch.
+        self._unrecorded: list[tuple[_Group, str, float, str | None]] = []
+        self._stats = {
+            "queued": 0,
+            "deduplicated": 0,
+            "sent": 0,
+            "messages": 0,
+            "retried": 0,
+            "retry_after": 0,
+            "failed": 0,
+            "errors": 0,
+        }
+
+    async def start(self) -> None:
+        if self._worker or bot is None:
+            return
+        await self._prune()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def enqueue(
+        self, chat_id: str, text: str, *, deep_link: str | None = None, dedupe_key: str | None = None
+    ) -> bool:
+        """Stores a message for delivery; an existing ``dedupe_key`` is a no-op."""
+        now = datetime.utcnow()
+        stmt = sqlite_insert(OutboxMessage).values(
+            chat_id=str(chat_id),
+            text=text,
+            deep_link=deep_link,
+            dedupe_key=dedupe_key,
+            status="pending",
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now,
+        )
+        if dedupe_key is not None:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["dedupe_key"])
+        async with SessionLocal() as session:
+            inserted = (await session.execute(stmt.returning(OutboxMessage.id))).scalar_one_or_none()
+            await session.commit()
+        if inserted is None:
+            self._stats["deduplicated"] += 1
+        else:
+            self._stats["queued"] += 1
+            self._wake.set()
+        return True
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                await self._dispatch()
+                failures = 0
+            except Exception:
+                # A failed query or status update must not end the dispatcher.
+                failures += 1
+                self._stats["errors"] += 1
+                delay = min(2 ** failures, MAX_ERROR_BACKOFF)
+                logger.exception("Outbox dispatch failed; retrying in %.0fs", delay)
+                await asyncio.sleep(delay)
+
+    async def _dispatch(self) -> None:
+        """Delivers one batch of due messages, or waits until the next one is due."""
+        self._wake.clear()
+        if self._unrecorded:
+            await self._record(self._unrecorded)
+            self._unrecorded = []
+        async with SessionLocal() as session:
+            rows = (
+                await session.execute(
+                    select(OutboxMessage)
+                    .where(OutboxMessage.status == "pending", OutboxMessage.next_attempt_at <= datetime.utcnow())
+                    .order_by(OutboxMessage.id)
+                    .limit(settings.outbox_batch_size)
+                )
+            ).scalars().all()
+            if not rows:
+                next_at = (
+                    await session.execute(
+                        select(func.min(OutboxMessage.next_attempt_at)).where(OutboxMessage.status == "pending")
+                    )
+                ).scalar_one()
+        if not rows:
+            delay = MAX_IDLE if next_at is None else (next_at - datetime.utcnow()).total_seconds()
+            try:
+                await asyncio.wait_for(self._wake.wait(), min(max(delay, 0.0), MAX_IDLE))
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        by_chat: dict[str, list[_Group]] = {}
+        for group in _coalesce(rows):
+            by_chat.setdefault(group.chat_id, []).append(group)
+        outcomes = await asyncio.gather(*(self._deliver_chat(groups) for groups in by_chat.values()))
+        outcomes = [outcome for chat_outcomes in outcomes for outcome in chat_outcomes]
+        try:
+            await self._record(outcomes)
+        except Exception:
+            # Keep the outcomes so delivered rows are marked sent, not re-sent,
+            # once the database recovers. Only a restart in between re-sends them.
+            self._unrecorded = outcomes
+            sent = [message_id for group, outcome, _, _ in outcomes if outcome == "sent" for message_id in group.ids]
+            logger.error("Could not record outbox outcomes; sent message(s) %s are still marked pending", sent)
+            raise
+
+    async def _deliver_chat(self, groups: list[_Group]) -> list[tuple[_Group, str, float, str | None]]:
+        """Sends one chat's groups in order; returns (group, outcome, delay, error) per group."""
+        outcomes = []
+        for group in groups:
+            await self.limiter.acquire(group.chat_id)
+            try:
+                await bot.send_message(group.chat_id, "\n\n".join(group.texts), reply_markup=_markup(group.deep_link))
+            except TelegramRetryAfter as exc:
+                self._stats["retry_after"] += 1
+                self.limiter.bucket(group.chat_id).penalize(exc.retry_after)
+                self.limiter.global_bucket.penalize(exc.retry_after)
+                outcomes.append((group, "retry_after", float(exc.retry_after), str(exc)))
+            except PERMANENT_ERRORS as exc:
+                logger.warning("Dropping outbox message(s) %s for chat %s: %s", group.ids, group.chat_id, exc)
+                outcomes.append((group, "failed", 0.0, str(exc)))
+            except (TelegramAPIError, OSError) as exc:
+                outcomes.append((group, "retry", self._backoff(group.attempts), str(exc)))
+            else:
+                self._stats["messages"] += 1
+                outcomes.append((group, "sent", 0.0, None))
+        return outcomes
+
+    async def _record(self, outcomes: list[tuple[_Group, str, float, str | None]]) -> None:
+        now = datetime.utcnow()
+        counts = {"sent": 0, "retried": 0, "failed": 0}
+        async with SessionLocal() as session:
+            for group, outcome, delay, error in outcomes:
+                where = OutboxMessage.id.in_(group.ids)
+                if outcome == "sent":
+                    values = {"status": "sent", "sent_at": now, "last_error": None}
+                    counts["sent"] += len(group.ids)
+                elif outcome == "retry_after":
+                    values = {"next_attempt_at": now + timedelta(seconds=delay), "last_error": error}
+                elif outcome == "retry" and group.attempts + 1 < settings.outbox_max_attempts:
+                    values = {
+                        "attempts": OutboxMessage.attempts + 1,
+                        "next_attempt_at": now + timedelta(seconds=delay),
+                        "last_error": error,
+                    }
+                    counts["retried"] += len(group.ids)
+                else:
+                    values = {"status": "failed", "attempts": OutboxMessage.attempts + 1, "last_error": error}
+                    counts["failed"] += len(group.ids)
+                await session.execute(update(OutboxMessage).where(where).values(**values))
+            await session.commit()
+        # Counted only once committed, so a retried _record does not count twice.
+        for key, count in counts.items():
+            self._stats[key] += count
+
+    async def _prune(self) -> None:
+        cutoff = datetime.utcnow() - timedelta(days=settings.outbox_retention_days)
+        async with SessionLocal() as session:
+            await session.execute(
+                delete(OutboxMessage).where(OutboxMessage.status != "pending", OutboxMessage.created_at < cutoff)
+            )
+            await session.commit()
+
+    @staticmethod
+    def _backoff(attempts: int) -> float:
+        base = min(settings.outbox_backoff_base * (2**attempts), settings.outbox_backoff_max)
+        return base * (0.5 + random.random() / 2)
+
+    def stats(self) -> dict:
+        return {**self._stats, "unrecorded": len(self._unrecorded), "running": self._worker is not None}
+
+
+outbox = TelegramOutbox()
+
+
+async def owner_chat_id(owner_id: int | None = None) -> str | None:
+    """The owner's Telegram chat; the default profile falls back to ADMIN_CHAT_ID."""
+    async with SessionLocal() as session:
+        default_id = await profile_service.default_id(session)
+        profile = await profile_service.get(session, owner_id or default_id)
+    if profile.telegram_chat_id:
+        return profile.telegram_chat_id
+    return settings.admin_chat_id if owner_id in (None, default_id) else None
+
+
+async def send_alert(message: str, deep_link: str | None = None, dedupe_key: str | None = None) -> bool:
+    """Queues ``message`` for the default profile's chat; False when there is nowhere to send it."""
+    if bot is None:
+        return False
+    chat_id = await owner_chat_id()
+    if not chat_id:
+        return False
+    return await outbox.enqueue(chat_id, message, deep_link=deep_link, dedupe_key=dedupe_key)
+
+
+async def verify_bot() -> str:
+    if bot is None:
+        return "missing"
+    try:
+        await bot.get_me()
+    except TelegramUnauthorizedError:
+        return "error:401"
+    except (TelegramAPIError, OSError):
+        return "error:network"
+    return "ok"
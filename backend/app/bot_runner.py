@@ -2,11 +2,11 @@ import logging
 import asyncio
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import CommandStart
-from aiogram.types import Message
-from sqlalchemy import select
+from aiogram.types import Message, Update
 from app.config import settings
 from app.db import SessionLocal
-from app.models import UserProfile, Task, TaskType
+from app.services.bot_ingest import task_ingest
+from app.services.profile import profile_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,10 +22,8 @@ async def cmd_start(message: Message):
     await message.answer(
         f"👋 **Welcome to Life OS Command!**\n\n"
         f"🆔 Your Chat ID is: `{chat_id}`\n\n"
-        f"**Setup Instructions:**\n"
-        f"1. Open Life OS Web App\n"
-        f"2. Go to **Settings**\n"
-        f"3. Enter this ID in the 'Telegram Chat ID' field\n\n"
+        f"**Setup:** open the Life OS Mini App from this chat once; "
+        f"your profile is linked automatically.\n\n"
         f"🚀 **How to use:**\n"
         f"Just send me any text, and I'll add it as a task to your inbox!",
         parse_mode="Markdown"
@@ -39,38 +37,77 @@ async def handle_message(message: Message):
     if not text:
         return
 
+    # Find user (cached; indexed lookup on a miss)
     async with SessionLocal() as session:
-        # Find user
-        stmt = select(UserProfile).where(UserProfile.telegram_chat_id == chat_id)
-        result = await session.execute(stmt)
-        profile = result.scalar_one_or_none()
-        
-        if not profile:
-            await message.answer(
-                f"⚠️ **Profile Not Found**\n\n"
-                f"I don't know who you are yet.\n"
-                f"Please add your Chat ID `{chat_id}` to the Life OS Settings.",
-                parse_mode="Markdown"
-            )
-            return
+        profile_id = await profile_service.id_for_chat(session, chat_id)
 
-        # Create Task
-        new_task = Task(
-            title=text,
-            task_type=TaskType.ONE_TIME,
-            niche_id=None  # Will go to "Inbox" or uncategorized
+    if profile_id is None:
+        await message.answer(
+            f"⚠️ **Profile Not Found**\n\n"
+            f"I don't know who you are yet.\n"
+            f"Open the Life OS Mini App once from this chat to link your profile.",
+            parse_mode="Markdown"
         )
-        session.add(new_task)
-        await session.commit()
-        
-        await message.answer(f"✅ **Task Added:** {text}", parse_mode="Markdown")
+        return
+
+    # Create Task through the batched writer; reply only once it is committed
+    try:
+        await task_ingest.submit(text, profile_id)
+    except Exception:
+        logger.exception("Failed to store task from chat %s", chat_id)
+        await message.answer("❌ Could not save the task, please try again.")
+        return
+
+    await message.answer(f"✅ **Task Added:** {text}", parse_mode="Markdown")
+
+_update_slots = asyncio.Semaphore(settings.telegram_webhook_concurrency)
+_update_tasks: set[asyncio.Task] = set()
+
+
+def webhook_url() -> str:
+    return settings.telegram_webhook_url or f"{settings.api_base_url.rstrip('/')}/telegram/webhook"
+
+
+async def _process_update(update: Update) -> None:
+    async with _update_slots:
+        try:
+            await dp.feed_update(bot, update)
+        except Exception:
+            logger.exception("Failed to handle update %s", update.update_id)
+
+
+def dispatch_update(update: Update) -> None:
+    """Handles a webhook update in the background, bounded by the concurrency limit."""
+    task = asyncio.create_task(_process_update(update))
+    _update_tasks.add(task)
+    task.add_done_callback(_update_tasks.discard)
+
 
 async def start_bot():
     if not bot:
         logger.warning("Telegram token not set. Bot will not run.")
         return
+
+    if settings.telegram_mode == "webhook":
+        if not settings.telegram_webhook_secret:
+            logger.error("TELEGRAM_WEBHOOK_SECRET is not set; refusing to register the webhook")
+            return
+        logger.info("Registering Telegram webhook at %s", webhook_url())
+        await bot.set_webhook(
+            webhook_url(),
+            secret_token=settings.telegram_webhook_secret,
+            allowed_updates=dp.resolve_used_update_types(),
+            drop_pending_updates=settings.telegram_drop_pending_updates,
+        )
+        return
     
     logger.info("Starting Telegram Bot...")
-    # Drop pending updates to avoid flooding on startup
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    await bot.delete_webhook(drop_pending_updates=settings.telegram_drop_pending_updates)
+    await dp.start_polling(bot, handle_signals=False)
+
+
+async def stop_bot() -> None:
+    if _update_tasks:
+        await asyncio.wait(set(_update_tasks), timeout=10)
+    if bot:
+        await bot.session.close()
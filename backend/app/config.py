@@ -1,3 +1,4 @@
+from pydantic import field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,10 +18,105 @@ class Settings(BaseSettings):
     mini_app_link: str | None = None
     timezone: str = "Europe/Kyiv"
     posting_timezone: str = "Europe/Kyiv"
+    posting_calendar_days: int = 14
+
+    xai_base_url: str = "https://api.x.ai/v1"
+    openai_base_url: str = "https://api.openai.com/v1"
+    llm_http2: bool = True
+    llm_timeout: float = 15.0
+    llm_connect_timeout: float = 5.0
+    llm_max_connections: int = 20
+    llm_max_keepalive: int = 10
+    llm_keepalive_expiry: float = 60.0
+    llm_max_concurrency: int = 8
+    llm_max_retries: int = 2
+    llm_backoff_base: float = 0.5
+    llm_backoff_max: float = 8.0
+    llm_single_flight: bool = True
+
+    llm_cache_backend: str = "memory"  # memory | sqlite
+    llm_cache_max_entries: int = 2048
+    llm_cache_sqlite_path: str = "./data/llm_cache.db"
+    llm_cache_ttls: dict[str, float] = {
+        "assistant.parse": 86400,
+        "marketing.hooks": 600,
+        "planning.brief": 3600,
+    }
+
+    gemini_model: str = "gemini-2.0-flash"
+    gemini_api_endpoint: str | None = None  # e.g. a regional or proxy host
+    banana_max_concurrency: int = 2
+    banana_max_upload_bytes: int = 10 * 1024 * 1024
+    banana_max_side: int = 1536
+    banana_timeout: float = 60.0
+
+    ai_metrics_flush_interval: float = 30.0
+    ai_metrics_buffer_size: int = 10000
+    ai_metrics_retention_days: int = 30
+
+    etag_enabled: bool = True
+    # Reject requests without Telegram initData instead of using the default profile.
+    # Unset means on whenever TELEGRAM_BOT_TOKEN is set, off for token-less local development.
+    auth_required: bool | None = None
+    profile_cache_size: int = 10000
+    telegram_auth_max_age: int = 86400  # seconds an initData auth_date stays valid
+    telegram_auth_cache_size: int = 4096
+    telegram_auth_cache_ttl: float = 300.0
+    # Browser origins allowed to call the API; the bundled Mini App is same-origin.
+    cors_origins: list[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
+    ai_context_token_budget: int = 1500
+
+    # Request instrumentation, exposed in Prometheus format at GET /metrics.
+    metrics_token: str | None = None  # bearer token for GET /metrics; unset disables it
+    slow_query_ms: float = 200.0
+    server_timing: bool = False  # adds a Server-Timing header to every response
+    loop_lag_interval: float = 0.5  # seconds between event-loop lag probes; 0 disables
+    loop_lag_warn_ms: float = 100.0
+
+    telegram_mode: str = "polling"  # polling | webhook
+    telegram_webhook_url: str | None = None  # defaults to {api_base_url}/telegram/webhook
+    telegram_webhook_secret: str | None = None
+    telegram_webhook_concurrency: int = 32
+    telegram_drop_pending_updates: bool = False
+
+    # Outbound Telegram limits: ~30 msg/s per bot, ~1 msg/s per chat.
+    telegram_global_rate: float = 30.0
+    telegram_chat_rate: float = 1.0
+    outbox_batch_size: int = 50
+    outbox_max_attempts: int = 8
+    outbox_backoff_base: float = 2.0
+    outbox_backoff_max: float = 600.0
+    outbox_retention_days: int = 7
+
+    bot_ingest_queue_size: int = 1000
+    bot_ingest_batch_size: int = 100
+    bot_ingest_flush_interval: float = 0.05
 
     sqlite_path: str = "./data/life_os.db"
+    # Applied to every new connection; set SQLITE_PROFILE=default to use library defaults.
+    sqlite_profile: str = "tuned"
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 32768
+    sqlite_mmap_size: int = 134217728
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_pool_size: int = 8
+    sqlite_max_overflow: int = 8
+    sqlite_pool_timeout: float = 30.0
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @field_validator("auth_required", mode="before")
+    @classmethod
+    def _blank_is_unset(cls, value):
+        return None if value == "" else value
+
+    @model_validator(mode="after")
+    def _resolve_auth_required(self) -> "Settings":
+        if self.auth_required is None:
+            self.auth_required = bool(self.telegram_bot_token)
+        return self
+
 
 settings = Settings()
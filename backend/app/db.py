@@ -1,7 +1,9 @@
 from collections.abc import AsyncGenerator
 from pathlib import Path
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import settings
@@ -15,7 +17,50 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(_build_db_url(), echo=False, future=True)
+def sqlite_pragmas() -> list[str]:
+    """PRAGMA statements for the configured performance profile."""
+    if settings.sqlite_profile == "default":
+        return []
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+    ]
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _engine_options() -> dict:
+    if settings.sqlite_profile == "default":
+        return {}
+    # aiosqlite defaults to NullPool (a new connection + thread per session).
+    # WAL lets readers proceed alongside the single writer, so keep a queue
+    # pool sized for concurrent dashboard reads instead.
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": settings.sqlite_pool_size,
+        "max_overflow": settings.sqlite_max_overflow,
+        "pool_timeout": settings.sqlite_pool_timeout,
+    }
+
+
+def build_engine(url: str | None = None) -> AsyncEngine:
+    new_engine = create_async_engine(url or _build_db_url(), echo=False, future=True, **_engine_options())
+    event.listen(new_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    return new_engine
+
+
+engine = build_engine()
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 
@@ -26,28 +71,41 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 
 async def init_db() -> None:
     import app.models  # noqa: F401
+    from app.migrations import run_migrations
 
     Path(settings.sqlite_path).parent.mkdir(parents=True, exist_ok=True)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
+
+
+DEFAULT_NICHES = (
+    {"name": "Спорт", "icon": "dumbbell", "color": "#EF4444", "description": "Тренировки и здоровье"},
+    {"name": "Работа", "icon": "briefcase", "color": "#3B82F6", "description": "Проекты и бизнес"},
+    {"name": "Отдых", "icon": "coffee", "color": "#10B981", "description": "Релакс и хобби"},
+)
+
+
+async def seed_niches(session: AsyncSession, owner_id: int) -> None:
+    """Adds the starter niches for a profile that has none; the caller commits."""
+    from sqlalchemy import select
+
+    from app.models import Niche
+
+    existing = await session.execute(select(Niche.id).where(Niche.owner_id == owner_id).limit(1))
+    if existing.first() is None:
+        session.add_all([Niche(owner_id=owner_id, **values) for values in DEFAULT_NICHES])
 
 
 async def seed_defaults() -> None:
     from sqlalchemy import select
 
-    from app.models import AccountPlatform, ModelStatus, Niche
+    from app.models import AccountPlatform, ModelStatus, PostingWindow
+    from app.services.profile import profile_service
 
     async with SessionLocal() as session:
-        # Seed Niches
-        niches_result = await session.execute(select(Niche))
-        if not niches_result.scalars().first():
-            session.add_all(
-                [
-                    Niche(name="Спорт", icon="dumbbell", color="#EF4444", description="Тренировки и здоровье"),
-                    Niche(name="Работа", icon="briefcase", color="#3B82F6", description="Проекты и бизнес"),
-                    Niche(name="Отдых", icon="coffee", color="#10B981", description="Релакс и хобби"),
-                ]
-            )
+        # Seed Niches for the default profile
+        await seed_niches(session, await profile_service.default_id(session))
 
         # Legacy Seeds
         models_result = await session.execute(select(ModelStatus))
@@ -69,4 +127,13 @@ async def seed_defaults() -> None:
                 ]
             )
 
+        windows_result = await session.execute(select(PostingWindow))
+        if not windows_result.scalars().first():
+            session.add_all(
+                [
+                    PostingWindow(label="US Morning", start_time="15:00", end_time="17:00"),
+                    PostingWindow(label="US Prime", start_time="19:00", end_time="22:00"),
+                ]
+            )
+
         await session.commit()
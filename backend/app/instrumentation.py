@@ -0,0 +1,275 @@
+"""Request timing, database query metrics and event-loop lag.
+
+:class:`InstrumentationMiddleware` times every HTTP request and labels it
+with the matched route template (``/tasks/{task_id}/log``), so path
+parameters do not explode the label set. SQLAlchemy cursor events time
+every query. A ``ContextVar`` attributes each query to the request that
+ran it; queries from the scheduler, bot and outbox are labelled
+``background``. Queries slower than ``SLOW_QUERY_MS`` are logged with
+their route.
+
+A monitor task sleeps ``LOOP_LAG_INTERVAL`` seconds at a time and records
+how late it wakes up. Lag means something held the event loop (CPU work
+or a blocking call); above ``LOOP_LAG_WARN_MS`` it is logged with the
+routes in flight at the time.
+
+``GET /metrics`` renders everything in the Prometheus text format. With
+``SERVER_TIMING=true`` responses also carry a ``Server-Timing`` header
+(``app`` = time to the response headers, ``db`` = query time and count)
+that browser dev tools show per request; the gap between the two is
+routing, validation and serialization.
+"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND = "background"
+UNMATCHED = "unmatched"
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+
+    def lines(self, name: str, labels: str = "") -> list[str]:
+        prefix = f"{labels}," if labels else ""
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+@dataclass(eq=False)
+class RequestTiming:
+    scope: dict
+    started: float
+    queries: int = 0
+    db_seconds: float = 0.0
+
+    @property
+    def route(self) -> str:
+        # FastAPI stores the matched route on the scope once routing is done.
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or UNMATCHED
+
+    def server_timing(self) -> str:
+        app_ms = (time.perf_counter() - self.started) * 1000
+        return f'app;dur={app_ms:.1f}, db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"'
+
+
+_current: ContextVar[RequestTiming | None] = ContextVar("request_timing", default=None)
+
+
+def _labels(**values: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(str(value))}"' for key, value in values.items())
+
+
+@dataclass
+class _RouteStats:
+    durations: Histogram = field(default_factory=lambda: Histogram(REQUEST_BUCKETS))
+    queries: Histogram = field(default_factory=lambda: Histogram(QUERY_COUNT_BUCKETS))
+    statuses: dict[int, int] = field(default_factory=dict)
+
+
+class RequestMetrics:
+    def __init__(self) -> None:
+        self._routes: dict[tuple[str, str], _RouteStats] = {}
+        self._db: dict[str, list] = {}  # route -> [queries, seconds]
+        self._query_durations = Histogram(QUERY_BUCKETS)
+        self._lag = Histogram(LAG_BUCKETS)
+        self._in_flight: set[RequestTiming] = set()
+        self._monitor: asyncio.Task | None = None
+        self.slow_queries = 0
+        self.max_lag = 0.0
+
+    def begin(self, scope: dict) -> tuple[RequestTiming, object]:
+        timing = RequestTiming(scope, time.perf_counter())
+        self._in_flight.add(timing)
+        return timing, _current.set(timing)
+
+    def end(self, timing: RequestTiming, token, status: int) -> None:
+        _current.reset(token)
+        self._in_flight.discard(timing)
+        stats = self._routes.setdefault((timing.scope["method"], timing.route), _RouteStats())
+        stats.durations.observe(time.perf_counter() - timing.started)
+        stats.queries.observe(timing.queries)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        timing = _current.get()
+        route = BACKGROUND
+        if timing is not None:
+            timing.queries += 1
+            timing.db_seconds += seconds
+            route = timing.route
+        totals = self._db.setdefault(route, [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+        self._query_durations.observe(seconds)
+        if seconds * 1000 >= settings.slow_query_ms:
+            self.slow_queries += 1
+            logger.warning("Slow query (%.1f ms, %s): %s", seconds * 1000, route, " ".join(statement.split())[:500])
+
+    async def start(self) -> None:
+        if self._monitor is None and settings.loop_lag_interval > 0:
+            self._monitor = asyncio.create_task(self._watch_loop())
+
+    async def stop(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+
+    async def _watch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = settings.loop_lag_interval
+        while True:
+            scheduled = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - scheduled)
+            self._lag.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag * 1000 >= settings.loop_lag_warn_ms:
+                routes = sorted({timing.route for timing in self._in_flight})
+                logger.warning("Event loop lagged %.0f ms; in flight: %s", lag * 1000, ", ".join(routes) or "none")
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = [
+            "# HELP http_requests_total HTTP requests by route template and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), stats in sorted(self._routes.items()):
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=str(status))}}} {count}")
+        lines += [
+            "# HELP http_request_duration_seconds Time from request start to the last response byte.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in sorted(self._routes.items()):
+            lines += stats.durations.lines("http_request_duration_seconds", _labels(method=method, route=route))
+        lines += [
+            "# HELP http_request_db_queries Database queries run per request.",
+            "# TYPE http_request_db_queries histogram",
+        ]
+        for (method, route), stats in sorted(self._routes.items()):
+            lines += stats.queries.lines("http_request_db_queries", _labels(method=method, route=route))
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {len(self._in_flight)}",
+            "# HELP db_queries_total Database queries by route template (background = outside a request).",
+            "# TYPE db_queries_total counter",
+        ]
+        for route, (queries, _) in sorted(self._db.items()):
+            lines.append(f"db_queries_total{{{_labels(route=route)}}} {queries}")
+        lines += [
+            "# HELP db_query_seconds_total Time spent in database queries by route template.",
+            "# TYPE db_query_seconds_total counter",
+        ]
+        for route, (_, seconds) in sorted(self._db.items()):
+            lines.append(f"db_query_seconds_total{{{_labels(route=route)}}} {seconds:.6f}")
+        lines += [
+            "# HELP db_query_duration_seconds Duration of single database queries.",
+            "# TYPE db_query_duration_seconds histogram",
+            *self._query_durations.lines("db_query_duration_seconds"),
+            f"# HELP db_slow_queries_total Queries slower than {settings.slow_query_ms:g} ms.",
+            "# TYPE db_slow_queries_total counter",
+            f"db_slow_queries_total {self.slow_queries}",
+            "# HELP event_loop_lag_seconds How late the event loop woke up from a timed sleep.",
+            "# TYPE event_loop_lag_seconds histogram",
+            *self._lag.lines("event_loop_lag_seconds"),
+            "# HELP event_loop_lag_max_seconds Largest event loop lag since startup.",
+            "# TYPE event_loop_lag_max_seconds gauge",
+            f"event_loop_lag_max_seconds {self.max_lag:.6f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Times every query on ``engine`` (cursor events run on the loop thread)."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info["query_started"].pop()
+        request_metrics.record_query(statement, time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context) -> None:
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware recording per-route timing and the request's database work."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timing, token = request_metrics.begin(scope)
+        status = 500
+
+        async def send_with_timing(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing:
+                    headers = [*message.get("headers", []), (b"server-timing", timing.server_timing().encode())]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_metrics.end(timing, token, status)
@@ -1,11 +1,12 @@
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
 
+from app.auth import INIT_DATA_HEADER, TelegramAuthMiddleware, current_user
 from app.config import settings
-from app.db import init_db, seed_defaults
+from app.db import engine, init_db, seed_defaults
+from app.instrumentation import InstrumentationMiddleware, instrument_engine, request_metrics
 from app.routers.health import router as health_router
 from app.routers.accounts import router as accounts_router
 from app.routers.marketing import router as marketing_router
@@ -17,64 +18,101 @@ from app.routers.niches import router as niches_router
 from app.routers.banana import router as banana_router
 from app.routers.system import router as system_router
 from app.routers.assistant import router as assistant_router
+from app.routers.telegram import router as telegram_router
+from app.routers.metrics import router as metrics_router
+from app.routers.prometheus import router as prometheus_router
+from app.bot import outbox
 from app.scheduler_worker import scheduler_worker
+from app.services.ai_telemetry import ai_telemetry
+from app.services.bot_ingest import task_ingest
+from app.services.llm_client import llm_client
+from app.services.reminders import reminders
+from app.services.response_cache import response_cache
+from app.services.static_assets import static_assets
 
 
+import asyncio
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await request_metrics.start()
+    await asyncio.to_thread(static_assets.load, FRONTEND_DIST)
     await init_db()
     await seed_defaults()
-    # scheduler_worker.start() # Disabled for now as we rebuild logic
+    await response_cache.start()
+    await ai_telemetry.start()
+    await llm_client.start()
+    task_ingest.start()
+    await outbox.start()
+    await reminders.reload()
+    await scheduler_worker.start()
     
     # Start Telegram Bot in background (Updated)
-    import asyncio
-    from app.bot_runner import start_bot
-    asyncio.create_task(start_bot())
+    from app.bot_runner import start_bot, stop_bot
+    bot_task = asyncio.create_task(start_bot())
     yield
+    bot_task.cancel()
+    await scheduler_worker.stop()
+    await outbox.stop()
+    await stop_bot()
+    await task_ingest.stop()
+    await llm_client.aclose()
+    await ai_telemetry.stop()
+    await response_cache.aclose()
+    await engine.dispose()
+    await request_metrics.stop()
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 FRONTEND_DIST = REPO_ROOT / "frontend" / "dist"
-INDEX_FILE = FRONTEND_DIST / "index.html"
 
+app.add_middleware(TelegramAuthMiddleware)
+# Added last so it wraps the auth middleware and 401s still carry CORS headers.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=settings.cors_origins,
+    allow_methods=["GET", "POST", "PATCH", "DELETE"],
+    allow_headers=["Content-Type", "If-None-Match", INIT_DATA_HEADER, "ngrok-skip-browser-warning"],
+    expose_headers=["ETag", "X-Next-Cursor"],
+    max_age=600,
 )
+# Outermost, so timings include auth and CORS handling.
+app.add_middleware(InstrumentationMiddleware)
+instrument_engine(engine)
+
+# When auth is required (the default once a bot token is set) every API
+# route needs verified initData; health
+# checks, the Telegram webhook and the Prometheus scrape (own secrets) stay open.
+authenticated = [Depends(current_user)]
 
 app.include_router(health_router)
-app.include_router(system_router)
-app.include_router(niches_router)  # New
-app.include_router(tasks_router)
-app.include_router(accounts_router)
-app.include_router(marketing_router)
-app.include_router(models_router)
-app.include_router(planning_router)
-app.include_router(scheduler_router)
-app.include_router(banana_router)
-app.include_router(assistant_router)
+app.include_router(system_router, dependencies=authenticated)
+app.include_router(niches_router, dependencies=authenticated)  # New
+app.include_router(tasks_router, dependencies=authenticated)
+app.include_router(accounts_router, dependencies=authenticated)
+app.include_router(marketing_router, dependencies=authenticated)
+app.include_router(models_router, dependencies=authenticated)
+app.include_router(planning_router, dependencies=authenticated)
+app.include_router(scheduler_router, dependencies=authenticated)
+app.include_router(banana_router, dependencies=authenticated)
+app.include_router(assistant_router, dependencies=authenticated)
+app.include_router(telegram_router)
+app.include_router(metrics_router, dependencies=authenticated)
+app.include_router(prometheus_router)
 
 
 @app.get("/", include_in_schema=False)
-async def root():
-    if INDEX_FILE.is_file():
-        return FileResponse(INDEX_FILE)
+async def root(request: Request):
+    if static_assets.index is not None:
+        return static_assets.response(static_assets.index, request)
     return {"status": "online", "service": settings.app_name}
 
 
 @app.get("/{full_path:path}", include_in_schema=False)
-async def spa_fallback(full_path: str):
-    if not INDEX_FILE.is_file():
+async def spa_fallback(full_path: str, request: Request):
+    # Served from the index built at startup; unknown paths get the SPA shell.
+    if static_assets.index is None:
         raise HTTPException(status_code=404, detail="Not Found")
-
-    requested = (FRONTEND_DIST / full_path).resolve()
-    if FRONTEND_DIST in requested.parents and requested.is_file():
-        return FileResponse(requested)
-
-    return FileResponse(INDEX_FILE)
+    return static_assets.response(static_assets.get(full_path) or static_assets.index, request)
@@ -0,0 +1,157 @@
+"""Schema migrations for existing SQLite files.
+
+``init_db`` runs ``create_all`` first, which builds fresh databases with the
+current schema but never touches tables that already exist. Migrations then
+bring older files up to date. They are tracked through ``PRAGMA
+user_version`` and must be idempotent, because a fresh database starts at
+version 0 and replays them over the schema ``create_all`` just created.
+"""
+import logging
+from collections.abc import Callable
+
+from sqlalchemy import Connection
+
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(conn: Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def add_column(conn: Connection, table: str, name: str, ddl: str) -> None:
+    if name not in _columns(conn, table):
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+
+
+def _profile_columns(conn: Connection) -> None:
+    add_column(conn, "user_profile", "inventory", "TEXT DEFAULT '[]'")
+    add_column(conn, "user_profile", "achievements", "TEXT DEFAULT '[]'")
+    add_column(conn, "user_profile", "telegram_chat_id", "VARCHAR(32)")
+
+
+def _task_log_indexes(conn: Connection) -> None:
+    # Keep the newest row per (task_id, date) before enforcing uniqueness.
+    conn.exec_driver_sql(
+        "DELETE FROM task_logs WHERE id NOT IN (SELECT MAX(id) FROM task_logs GROUP BY task_id, date)"
+    )
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_task_logs_date")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_task_logs_task_id_date ON task_logs (task_id, date)"
+    )
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_task_logs_date_status ON task_logs (date, status)")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_tasks_is_archived_created_at ON tasks (is_archived, created_at)"
+    )
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_tasks_niche_id_is_archived ON tasks (niche_id, is_archived)")
+
+
+def _backfill_daily_stats(conn: Connection) -> None:
+    if "owner_id" in _columns(conn, "daily_stats"):
+        return  # per-owner table, backfilled by migration 5
+    conn.exec_driver_sql("DELETE FROM daily_stats")
+    conn.exec_driver_sql(
+        "INSERT INTO daily_stats (date, completed) "
+        "SELECT date, COUNT(id) FROM task_logs WHERE status = 'done' GROUP BY date"
+    )
+
+
+def _profile_chat_index(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_user_profile_telegram_chat_id ON user_profile (telegram_chat_id)"
+    )
+
+
+def _owner_columns(conn: Connection) -> None:
+    # Rows written before profiles had owners belong to the first profile.
+    owner_id = conn.exec_driver_sql("SELECT MIN(id) FROM user_profile").scalar()
+    has_rows = conn.exec_driver_sql(
+        "SELECT EXISTS (SELECT 1 FROM tasks) OR EXISTS (SELECT 1 FROM niches)"
+    ).scalar()
+    if owner_id is None and has_rows:
+        owner_id = conn.exec_driver_sql(
+            "INSERT INTO user_profile (level, xp, streak, inventory, achievements) "
+            "VALUES (1, 0, 0, '[]', '[]') RETURNING id"
+        ).scalar()
+
+    add_column(conn, "tasks", "owner_id", "INTEGER REFERENCES user_profile (id)")
+    conn.exec_driver_sql("UPDATE tasks SET owner_id = ? WHERE owner_id IS NULL", (owner_id,))
+    add_column(conn, "task_logs", "owner_id", "INTEGER REFERENCES user_profile (id)")
+    conn.exec_driver_sql(
+        "UPDATE task_logs SET owner_id = (SELECT owner_id FROM tasks WHERE tasks.id = task_logs.task_id) "
+        "WHERE owner_id IS NULL"
+    )
+    conn.exec_driver_sql("DELETE FROM task_logs WHERE owner_id IS NULL")  # logs of deleted tasks
+
+    # Owner-leading indexes replace the global ones from migration 2.
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_tasks_is_archived_created_at")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_tasks_owner_id_is_archived_created_at "
+        "ON tasks (owner_id, is_archived, created_at)"
+    )
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_task_logs_date_status")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_task_logs_owner_id_date_status ON task_logs (owner_id, date, status)"
+    )
+
+    # Niche names become unique per owner; SQLite cannot drop the old
+    # table-level UNIQUE (name), so the table is rebuilt.
+    if "owner_id" not in _columns(conn, "niches"):
+        conn.exec_driver_sql(
+            "CREATE TABLE niches_new ("
+            "id INTEGER NOT NULL, owner_id INTEGER NOT NULL, name VARCHAR(64) NOT NULL, description TEXT, "
+            "color VARCHAR(7) NOT NULL, icon VARCHAR(32) NOT NULL, is_active BOOLEAN NOT NULL, "
+            "created_at DATETIME NOT NULL, PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES user_profile (id))"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO niches_new (id, owner_id, name, description, color, icon, is_active, created_at) "
+            "SELECT id, ?, name, description, color, icon, is_active, created_at FROM niches",
+            (owner_id,),
+        )
+        conn.exec_driver_sql("DROP TABLE niches")
+        conn.exec_driver_sql("ALTER TABLE niches_new RENAME TO niches")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_niches_id ON niches (id)")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS uq_niches_owner_id_name ON niches (owner_id, name)")
+
+    if "owner_id" not in _columns(conn, "daily_stats"):
+        conn.exec_driver_sql("DROP TABLE daily_stats")
+        conn.exec_driver_sql(
+            "CREATE TABLE daily_stats ("
+            "owner_id INTEGER NOT NULL, date VARCHAR(10) NOT NULL, completed INTEGER NOT NULL, "
+            "PRIMARY KEY (owner_id, date), FOREIGN KEY(owner_id) REFERENCES user_profile (id))"
+        )
+    conn.exec_driver_sql("DELETE FROM daily_stats")
+    conn.exec_driver_sql(
+        "INSERT INTO daily_stats (owner_id, date, completed) "
+        "SELECT owner_id, date, COUNT(id) FROM task_logs WHERE status = 'done' GROUP BY owner_id, date"
+    )
+
+    # A Telegram chat identifies exactly one profile; keep the oldest claim.
+    conn.exec_driver_sql(
+        "UPDATE user_profile SET telegram_chat_id = NULL WHERE telegram_chat_id = '' OR id NOT IN "
+        "(SELECT MIN(id) FROM user_profile WHERE telegram_chat_id IS NOT NULL GROUP BY telegram_chat_id)"
+    )
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_user_profile_telegram_chat_id")
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX ix_user_profile_telegram_chat_id ON user_profile (telegram_chat_id)"
+    )
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "user_profile inventory/achievements/telegram_chat_id", _profile_columns),
+    (2, "composite indexes for task/task_log hot queries", _task_log_indexes),
+    (3, "backfill daily_stats rollup", _backfill_daily_stats),
+    (4, "index user_profile.telegram_chat_id", _profile_chat_index),
+    (5, "per-owner tasks, niches, task_logs and daily_stats", _owner_columns),
+]
+
+
+def run_migrations(conn: Connection) -> None:
+    current = conn.exec_driver_sql("PRAGMA user_version").scalar_one()
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info("Applying migration %s: %s", version, description)
+        migrate(conn)
+        conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+    conn.exec_driver_sql("PRAGMA optimize")
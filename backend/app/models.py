@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -21,9 +21,11 @@ class TaskStatus(str, Enum):
 
 class Niche(Base):
     __tablename__ = "niches"
+    __table_args__ = (Index("uq_niches_owner_id_name", "owner_id", "name", unique=True),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    name: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_profile.id"), nullable=False)
+    name: Mapped[str] = mapped_column(String(64), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     color: Mapped[str] = mapped_column(String(7), default="#3B82F6")  # HEX color
     icon: Mapped[str] = mapped_column(String(32), default="folder")  # Lucide icon name
@@ -46,14 +48,19 @@ class UserProfile(Base):
     # Inventory & Achievements (JSON stored as Text for SQLite simplicity)
     inventory: Mapped[str] = mapped_column(Text, default="[]")  # List of item IDs
     achievements: Mapped[str] = mapped_column(Text, default="[]")  # List of achievement IDs
-    telegram_chat_id: Mapped[str] = mapped_column(String(32), nullable=True)  # Telegram Chat ID
+    telegram_chat_id: Mapped[str] = mapped_column(String(32), nullable=True, unique=True, index=True)  # Telegram Chat ID
 
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_owner_id_is_archived_created_at", "owner_id", "is_archived", "created_at"),
+        Index("ix_tasks_niche_id_is_archived", "niche_id", "is_archived"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_profile.id"), nullable=False)
     niche_id: Mapped[int] = mapped_column(Integer, ForeignKey("niches.id"), nullable=True)
     
     title: Mapped[str] = mapped_column(String(240), nullable=False)
@@ -78,20 +85,81 @@ class Task(Base):
 
 class TaskLog(Base):
     __tablename__ = "task_logs"
+    __table_args__ = (
+        # Unique index rather than a table constraint so existing databases
+        # can gain it through a migration (SQLite cannot ALTER constraints).
+        Index("uq_task_logs_task_id_date", "task_id", "date", unique=True),
+        Index("ix_task_logs_owner_id_date_status", "owner_id", "date", "status"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     task_id: Mapped[int] = mapped_column(Integer, ForeignKey("tasks.id"))
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_profile.id"), nullable=False)  # copy of tasks.owner_id
     
     status: Mapped[str] = mapped_column(String(20), default=TaskStatus.PENDING)
     completed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     note: Mapped[str] = mapped_column(Text, nullable=True)  # Why missed? or Reflection
     
-    date: Mapped[str] = mapped_column(String(10), index=True)  # YYYY-MM-DD for stats aggregation
+    date: Mapped[str] = mapped_column(String(10))  # YYYY-MM-DD for stats aggregation
 
     # Relationships
     task = relationship("Task", back_populates="logs")
 
 
+class DailyStat(Base):
+    """Rollup of DONE task logs per owner and day, maintained by app.services.daily_stats."""
+
+    __tablename__ = "daily_stats"
+
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("user_profile.id"), primary_key=True)
+    date: Mapped[str] = mapped_column(String(10), primary_key=True)  # YYYY-MM-DD
+    completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class SchedulerFired(Base):
+    """Occurrences already delivered by app.services.scheduler_engine."""
+
+    __tablename__ = "scheduler_fired"
+
+    key: Mapped[str] = mapped_column(String(160), primary_key=True)  # {job_id}@{occurrence}
+    fired_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class OutboxMessage(Base):
+    """Outbound Telegram message, delivered by the dispatcher in app.bot."""
+
+    __tablename__ = "outbox"
+    __table_args__ = (Index("ix_outbox_status_next_attempt_at", "status", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    chat_id: Mapped[str] = mapped_column(String(32), nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    deep_link: Mapped[str] = mapped_column(String, nullable=True)
+    dedupe_key: Mapped[str] = mapped_column(String(160), nullable=True, unique=True)
+    status: Mapped[str] = mapped_column(String(12), default="pending")  # pending, sent, failed
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+
+class AICall(Base):
+    """One upstream AI call, flushed in batches by app.services.ai_telemetry."""
+
+    __tablename__ = "ai_calls"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    provider: Mapped[str] = mapped_column(String(16), nullable=False)
+    model: Mapped[str] = mapped_column(String(64), nullable=False)
+    endpoint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)  # ok, cached, cancelled, error[:code]
+    prompt_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    completion_tokens: Mapped[int] = mapped_column(Integer, default=0)
+    latency_ms: Mapped[float] = mapped_column(Float, default=0.0)
+
+
 # --- Legacy / Extensions (Keeping these for compatibility/future use) ---
 
 class ModelStatus(Base):
@@ -121,3 +189,22 @@ class AccountPlatform(Base):
     platform: Mapped[str] = mapped_column(String(32), unique=True, nullable=False)
     accounts: Mapped[int] = mapped_column(Integer, default=0)
     status: Mapped[str] = mapped_column(String(24), default="Standby")
+
+    posting_windows = relationship("PostingWindow", back_populates="platform", cascade="all, delete-orphan")
+
+
+class PostingWindow(Base):
+    __tablename__ = "posting_windows"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    platform_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("account_platforms.id"), nullable=True, index=True
+    )  # NULL = all platforms
+    label: Mapped[str] = mapped_column(String(64), nullable=False)
+    start_time: Mapped[str] = mapped_column(String(5), nullable=False)  # HH:MM, posting timezone
+    end_time: Mapped[str] = mapped_column(String(5), nullable=False)  # earlier than start = ends next day
+    week_days: Mapped[str] = mapped_column(String(20), nullable=True)  # 1,3,5 for Mon,Wed,Fri; NULL = daily
+    alert_minutes: Mapped[int] = mapped_column(Integer, default=15)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+    platform = relationship("AccountPlatform", back_populates="posting_windows")
@@ -2,21 +2,25 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth import require_default_owner
 from app.db import get_session
 from app.models import AccountPlatform
 from app.schemas import AccountPlatformRead, AccountPlatformUpdate
+from app.services.data_version import conditional, data_version
 
 
 router = APIRouter(prefix="/accounts", tags=["accounts"])
+# Shared data: anyone may read it, only the operator's (default) profile may change it.
+operator_only = [Depends(require_default_owner)]
 
 
-@router.get("/", response_model=list[AccountPlatformRead])
+@router.get("/", response_model=list[AccountPlatformRead], dependencies=[conditional("accounts")])
 async def list_accounts(session: AsyncSession = Depends(get_session)) -> list[AccountPlatformRead]:
     result = await session.execute(select(AccountPlatform).order_by(AccountPlatform.id.asc()))
     return list(result.scalars().all())
 
 
-@router.patch("/{account_id}", response_model=AccountPlatformRead)
+@router.patch("/{account_id}", response_model=AccountPlatformRead, dependencies=operator_only)
 async def update_account(
     account_id: int,
     payload: AccountPlatformUpdate,
@@ -30,5 +34,6 @@ async def update_account(
     if payload.status is not None:
         platform.status = payload.status
     await session.commit()
+    data_version.bump("accounts")
     await session.refresh(platform)
     return platform
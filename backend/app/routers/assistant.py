@@ -1,17 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import httpx
 import json
+import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from app.auth import current_owner
 from app.config import settings
 from app.db import get_session
 from app.models import Task, TaskLog, TaskStatus
+from app.services.llm_client import LLMError, llm_client
+from app.services.sse import sse_response
 
 router = APIRouter(prefix="/assistant", tags=["assistant"])
+logger = logging.getLogger(__name__)
 
 class ParseRequest(BaseModel):
     text: str
@@ -37,20 +42,15 @@ class SummaryResponse(BaseModel):
     summary: str
     grade: str
 
-@router.post("/breakdown", response_model=BreakdownResponse)
-async def break_down_goal(payload: BreakdownRequest):
-    if not settings.xai_api_key:
-        raise HTTPException(status_code=503, detail="AI not configured")
-        
+def _breakdown_payload(goal: str) -> dict:
     prompt = (
         "Break down the following goal into 3-5 actionable subtasks. "
         "For each subtask, suggest a niche (Work, Sport, Rest, Learn, Health, Hobby, etc.). "
-        f"Goal: {payload.goal} "
+        f"Goal: {goal} "
         "Output JSON: { \"subtasks\": [ { \"title\": string, \"niche\": string } ] }"
     )
 
-    headers = {"Authorization": f"Bearer {settings.xai_api_key}"}
-    data = {
+    return {
         "model": settings.grok_model,
         "messages": [
             {"role": "system", "content": "You are a JSON generator. Output ONLY valid JSON."},
@@ -59,25 +59,61 @@ async def break_down_goal(payload: BreakdownRequest):
         "temperature": 0.7
     }
 
+
+def _load_json(content: str) -> dict:
+    """Parses a JSON object reply, tolerating markdown fences; raises ValueError otherwise."""
+    parsed = json.loads(content.replace("```json", "").replace("```", "").strip())
+    if not isinstance(parsed, dict):
+        raise ValueError("AI reply is not a JSON object")
+    return parsed
+
+
+def _parse_breakdown(content: str) -> BreakdownResponse:
+    return BreakdownResponse(**_load_json(content))
+
+
+@router.post("/breakdown", response_model=BreakdownResponse)
+async def break_down_goal(payload: BreakdownRequest):
+    if not settings.xai_api_key:
+        raise HTTPException(status_code=503, detail="AI not configured")
+
+    data = _breakdown_payload(payload.goal)
+
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.post("https://api.x.ai/v1/chat/completions", json=data, headers=headers)
-        
-        if resp.status_code != 200:
+        try:
+            content = await llm_client.chat(
+                "xai", data, endpoint="assistant.breakdown", timeout=15.0, validate=_parse_breakdown
+            )
+        except LLMError:
             raise HTTPException(status_code=502, detail="AI Service Error")
-            
-        content = resp.json()["choices"][0]["message"]["content"]
-        content = content.replace("```json", "").replace("```", "").strip()
-        parsed = json.loads(content)
-        
-        return BreakdownResponse(**parsed)
-    except Exception as e:
-        print(f"Breakdown Error: {e}")
+
+        return _parse_breakdown(content)
+    except Exception:
+        logger.exception("Breakdown failed")
         return BreakdownResponse(subtasks=[])
 
 
+@router.post("/breakdown/stream")
+async def stream_break_down_goal(payload: BreakdownRequest, request: Request) -> StreamingResponse:
+    """SSE variant of /breakdown: raw ``token`` events, then a parsed ``done`` event."""
+    if not settings.xai_api_key:
+        raise HTTPException(status_code=503, detail="AI not configured")
+
+    def finalize(content: str) -> dict:
+        try:
+            return _parse_breakdown(content).model_dump()
+        except Exception:
+            logger.exception("Breakdown failed")
+            return BreakdownResponse(subtasks=[]).model_dump()
+
+    chunks = llm_client.stream_chat(
+        "xai", _breakdown_payload(payload.goal), endpoint="assistant.breakdown.stream", timeout=30.0
+    )
+    return sse_response(request, chunks, finalize)
+
+
 @router.get("/daily-summary", response_model=SummaryResponse)
-async def get_daily_summary(session: AsyncSession = Depends(get_session)):
+async def get_daily_summary(session: AsyncSession = Depends(get_session), owner_id: int = Depends(current_owner)):
     if not settings.xai_api_key:
         return SummaryResponse(summary="AI not configured.", grade="N/A")
 
@@ -87,6 +123,7 @@ async def get_daily_summary(session: AsyncSession = Depends(get_session)):
 
     # Fetch completed tasks today
     completed_query = select(Task.title).join(TaskLog).where(
+        TaskLog.owner_id == owner_id,
         TaskLog.date == today_str,
         TaskLog.status == TaskStatus.DONE
     )
@@ -100,7 +137,7 @@ async def get_daily_summary(session: AsyncSession = Depends(get_session)):
     # Or fetch all active tasks to see what remains.
     
     # Let's fetch all active tasks to compare
-    active_query = select(Task).where(Task.is_archived == False)
+    active_query = select(Task).where(Task.owner_id == owner_id, Task.is_archived == False)
     active_tasks = (await session.execute(active_query)).scalars().all()
     
     pending_titles = []
@@ -109,6 +146,7 @@ async def get_daily_summary(session: AsyncSession = Depends(get_session)):
     # Simple logic: if task id not in completed_ids (which we'd need to fetch), it's pending.
     # Let's re-fetch completed with IDs to filter
     completed_ids_query = select(TaskLog.task_id).where(
+        TaskLog.owner_id == owner_id,
         TaskLog.date == today_str,
         TaskLog.status == TaskStatus.DONE
     )
@@ -127,7 +165,6 @@ async def get_daily_summary(session: AsyncSession = Depends(get_session)):
         "Output JSON: { \"summary\": string, \"grade\": string }"
     )
 
-    headers = {"Authorization": f"Bearer {settings.xai_api_key}"}
     data = {
         "model": settings.grok_model,
         "messages": [
@@ -138,22 +175,21 @@ async def get_daily_summary(session: AsyncSession = Depends(get_session)):
     }
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.post("https://api.x.ai/v1/chat/completions", json=data, headers=headers)
-        
-        if resp.status_code != 200:
+        try:
+            content = await llm_client.chat(
+                "xai", data, endpoint="assistant.daily_summary", timeout=15.0, validate=_load_json
+            )
+        except LLMError:
             return SummaryResponse(summary="AI Service Unavailable", grade="?")
-            
-        content = resp.json()["choices"][0]["message"]["content"]
-        content = content.replace("```json", "").replace("```", "").strip()
-        parsed = json.loads(content)
+
+        parsed = _load_json(content)
         
         return SummaryResponse(
             summary=parsed.get("summary", "No summary generated."),
             grade=parsed.get("grade", "C")
         )
-    except Exception as e:
-        print(f"AI Summary Error: {e}")
+    except Exception:
+        logger.exception("AI summary failed")
         return SummaryResponse(summary="Failed to generate summary.", grade="E")
 
 
@@ -171,7 +207,6 @@ async def parse_task(payload: ParseRequest):
         f"Input: \"{payload.text}\""
     )
 
-    headers = {"Authorization": f"Bearer {settings.xai_api_key}"}
     data = {
         "model": settings.grok_model,
         "messages": [
@@ -182,16 +217,14 @@ async def parse_task(payload: ParseRequest):
     }
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post("https://api.x.ai/v1/chat/completions", json=data, headers=headers)
-        
-        if resp.status_code != 200:
+        try:
+            content = await llm_client.chat(
+                "xai", data, endpoint="assistant.parse", timeout=10.0, validate=_load_json
+            )
+        except LLMError:
             return ParseResponse(title=payload.text)
-            
-        content = resp.json()["choices"][0]["message"]["content"]
-        # Clean markdown if present
-        content = content.replace("```json", "").replace("```", "").strip()
-        parsed = json.loads(content)
+
+        parsed = _load_json(content)
         
         return ParseResponse(
             title=parsed.get("title", payload.text),
@@ -200,6 +233,6 @@ async def parse_task(payload: ParseRequest):
             scheduled_time=parsed.get("scheduled_time"),
             due_date=parsed.get("due_date")
         )
-    except Exception as e:
-        print(f"AI Parse Error: {e}")
+    except Exception:
+        logger.exception("AI parse failed")
         return ParseResponse(title=payload.text)
@@ -1,18 +1,69 @@
+import asyncio
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 import google.generativeai as genai
-from PIL import Image
-import io
+from PIL import Image, ImageOps, UnidentifiedImageError
 
 from app.config import settings
+from app.services.ai_telemetry import ai_telemetry
 
 router = APIRouter(prefix="/banana", tags=["banana"])
+logger = logging.getLogger(__name__)
 
+PROMPTS = {
+    "roast": "Look at this photo and give a funny, light-hearted roast of what's happening. Be witty but not mean. Russian language.",
+    "compliment": "Look at this photo and give a genuine, high-energy compliment. Russian language.",
+    "caption": "Generate 3 viral Instagram captions for this photo. Russian language.",
+}
+READ_CHUNK = 256 * 1024
 
-def get_genai_model():
+# Image decoding/resizing is CPU-bound; keep it off the event loop and cap
+# how many jobs run at once so uploads cannot starve the API and the bot.
+_image_pool = ThreadPoolExecutor(max_workers=settings.banana_max_concurrency, thread_name_prefix="banana")
+_image_slots = asyncio.Semaphore(settings.banana_max_concurrency)
+_model: genai.GenerativeModel | None = None
+
+
+def get_genai_model() -> genai.GenerativeModel | None:
+    """Configures the SDK and builds the model once per process."""
+    global _model
     if not settings.google_api_key:
         return None
-    genai.configure(api_key=settings.google_api_key)
-    return genai.GenerativeModel('gemini-2.0-flash')
+    if _model is None:
+        client_options = {"api_endpoint": settings.gemini_api_endpoint} if settings.gemini_api_endpoint else None
+        genai.configure(api_key=settings.google_api_key, client_options=client_options)
+        _model = genai.GenerativeModel(settings.gemini_model)
+    return _model
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    limit = settings.banana_max_upload_bytes
+    if file.size is not None and file.size > limit:
+        raise HTTPException(status_code=413, detail=f"Image larger than {limit // (1024 * 1024)} MB")
+    buffer = bytearray()
+    while chunk := await file.read(READ_CHUNK):
+        buffer += chunk
+        if len(buffer) > limit:
+            raise HTTPException(status_code=413, detail=f"Image larger than {limit // (1024 * 1024)} MB")
+    return bytes(buffer)
+
+
+def _prepare_image(contents: bytes, max_side: int) -> bytes:
+    """Decodes, downscales to ``max_side`` and re-encodes as JPEG (runs in the pool)."""
+    with Image.open(io.BytesIO(contents)) as image:
+        # Lets the JPEG decoder skip work by decoding at a reduced scale.
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=85, optimize=True)
+        return output.getvalue()
 
 
 @router.post("/magic")
@@ -24,24 +75,41 @@ async def banana_magic(
     if not model:
         raise HTTPException(status_code=503, detail="Google API Key missing")
 
-    try:
-        # Read image
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-        
-        prompt = "Describe this image."
-        if mode == "roast":
-            prompt = "Look at this photo and give a funny, light-hearted roast of what's happening. Be witty but not mean. Russian language."
-        elif mode == "compliment":
-            prompt = "Look at this photo and give a genuine, high-energy compliment. Russian language."
-        elif mode == "caption":
-            prompt = "Generate 3 viral Instagram captions for this photo. Russian language."
-            
-        response = model.generate_content([prompt, image])
-        return {"result": response.text}
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    contents = await _read_upload(file)
+    prompt = PROMPTS.get(mode, "Describe this image.")
+
+    async with _image_slots:
+        loop = asyncio.get_running_loop()
+        try:
+            jpeg = await loop.run_in_executor(_image_pool, _prepare_image, contents, settings.banana_max_side)
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            raise HTTPException(status_code=400, detail="Unsupported or corrupt image")
+
+        started = time.perf_counter()
+        status = "error"
+        usage = None
+        try:
+            response = await model.generate_content_async(
+                [prompt, {"mime_type": "image/jpeg", "data": jpeg}],
+                request_options={"timeout": settings.banana_timeout},
+            )
+            text = response.text
+            usage = response.usage_metadata
+            status = "ok"
+        except Exception as e:
+            logger.exception("Gemini call failed")
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            ai_telemetry.record(
+                "gemini",
+                settings.gemini_model,
+                "banana.magic",
+                latency_ms=(time.perf_counter() - started) * 1000,
+                status=status,
+                prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+                completion_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+            )
+    return {"result": text}
 
 
 @router.post("/faceswap")
@@ -1,8 +1,14 @@
-import httpx
 from fastapi import APIRouter
 
-from app.bot import verify_bot
+from app import auth
+from app.bot import outbox, verify_bot
 from app.config import settings
+from app.services.bot_ingest import task_ingest
+from app.services.posting_calendar import posting_calendar
+from app.services.reminders import reminders
+from app.services.scheduler_engine import scheduler_engine
+from app.services.llm_client import LLMError, llm_client
+from app.services.response_cache import response_cache
 
 
 router = APIRouter(prefix="/health", tags=["health"])
@@ -24,6 +30,28 @@ async def check_health(verify: bool = False) -> dict:
     return result
 
 
+@router.get("/llm")
+async def llm_stats() -> dict:
+    return {
+        "providers": llm_client.stats(),
+        "cache": response_cache.stats(),
+        "single_flight": llm_client.flight_stats(),
+        "streams": llm_client.stream_stats(),
+    }
+
+
+@router.get("/bot")
+async def bot_stats() -> dict:
+    return {
+        "ingest": task_ingest.stats(),
+        "outbox": outbox.stats(),
+        "scheduler": scheduler_engine.stats(),
+        "reminders": reminders.stats(),
+        "calendar": posting_calendar.stats(),
+        "auth": auth.verifier.stats() if auth.verifier else None,
+    }
+
+
 def _key_state(value: str | None) -> str:
     return "configured" if value else "missing"
 
@@ -32,25 +60,17 @@ async def _verify_openai() -> str:
     if not settings.openai_api_key:
         return "missing"
     try:
-        async with httpx.AsyncClient(timeout=6.0) as client:
-            response = await client.get(
-                "https://api.openai.com/v1/models",
-                headers={"Authorization": f"Bearer {settings.openai_api_key}"},
-            )
-        return "ok" if response.status_code == 200 else f"error:{response.status_code}"
-    except httpx.HTTPError:
+        response = await llm_client.request("openai", "GET", "/models", timeout=6.0)
+    except LLMError:
         return "error:network"
+    return "ok" if response.status_code == 200 else f"error:{response.status_code}"
 
 
 async def _verify_xai() -> str:
     if not settings.xai_api_key:
         return "missing"
     try:
-        async with httpx.AsyncClient(timeout=6.0) as client:
-            response = await client.get(
-                "https://api.x.ai/v1/models",
-                headers={"Authorization": f"Bearer {settings.xai_api_key}"},
-            )
-        return "ok" if response.status_code == 200 else f"error:{response.status_code}"
-    except httpx.HTTPError:
+        response = await llm_client.request("xai", "GET", "/models", timeout=6.0)
+    except LLMError:
         return "error:network"
+    return "ok" if response.status_code == 200 else f"error:{response.status_code}"
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import httpx
 
 from app.config import settings
+from app.services.llm_client import LLMError, llm_client
 
 
 router = APIRouter(prefix="/marketing", tags=["marketing"])
@@ -46,7 +46,6 @@ def _build_prompt(model_name: str) -> str:
 
 
 async def _call_xai(prompt: str) -> list[str]:
-    headers = {"Authorization": f"Bearer {settings.xai_api_key}"}
     payload = {
         "model": settings.grok_model,
         "messages": [
@@ -57,15 +56,10 @@ async def _call_xai(prompt: str) -> list[str]:
         "max_tokens": 260,
     }
     try:
-        async with httpx.AsyncClient(timeout=12.0) as client:
-            response = await client.post("https://api.x.ai/v1/chat/completions", json=payload, headers=headers)
-        if response.status_code != 200:
-            return []
-        data = response.json()
-        content = data["choices"][0]["message"]["content"]
-        return _extract_hooks(content)
-    except httpx.HTTPError:
+        content = await llm_client.chat("xai", payload, endpoint="marketing.hooks", timeout=12.0)
+    except LLMError:
         return []
+    return _extract_hooks(content)
 
 
 def _extract_hooks(text: str) -> list[str]:
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Query
+
+from app.services.ai_telemetry import ai_telemetry
+
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/ai")
+async def ai_metrics(
+    hours: int | None = Query(default=None, ge=1, le=24 * 90, description="Aggregate persisted calls instead"),
+) -> dict:
+    """Per provider/model/endpoint call counts, token usage and latency percentiles.
+
+    Without ``hours`` the numbers cover this process since it started;
+    with it they are computed from the ``ai_calls`` table.
+    """
+    if hours is None:
+        return {
+            "source": "memory",
+            "since": ai_telemetry.started_at.isoformat(),
+            "dropped": ai_telemetry.dropped,
+            "calls": ai_telemetry.summary(),
+        }
+    return {"source": "db", "hours": hours, "calls": await ai_telemetry.history(hours)}
@@ -2,21 +2,25 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth import require_default_owner
 from app.db import get_session
 from app.models import ModelStatus
 from app.schemas import ModelStatusRead, ModelStatusUpdate
+from app.services.data_version import conditional, data_version
 
 
 router = APIRouter(prefix="/models", tags=["models"])
+# Shared data: anyone may read it, only the operator's (default) profile may change it.
+operator_only = [Depends(require_default_owner)]
 
 
-@router.get("/", response_model=list[ModelStatusRead])
+@router.get("/", response_model=list[ModelStatusRead], dependencies=[conditional("models")])
 async def list_models(session: AsyncSession = Depends(get_session)) -> list[ModelStatusRead]:
     result = await session.execute(select(ModelStatus).order_by(ModelStatus.id.asc()))
     return list(result.scalars().all())
 
 
-@router.patch("/{model_id}", response_model=ModelStatusRead)
+@router.patch("/{model_id}", response_model=ModelStatusRead, dependencies=operator_only)
 async def update_model(
     model_id: int,
     payload: ModelStatusUpdate,
@@ -30,5 +34,6 @@ async def update_model(
     if payload.status is not None:
         model.status = payload.status
     await session.commit()
+    data_version.bump("models")
     await session.refresh(model)
     return model
@@ -1,35 +1,51 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth import current_owner
 from app.db import get_session
 from app.models import Niche
 from app.schemas import NicheCreate, NicheRead
+from app.services.data_version import conditional, data_version
 
 router = APIRouter(prefix="/niches", tags=["niches"])
 
 
 @router.post("/", response_model=NicheRead)
-async def create_niche(payload: NicheCreate, session: AsyncSession = Depends(get_session)) -> NicheRead:
-    niche = Niche(**payload.model_dump())
+async def create_niche(
+    payload: NicheCreate, session: AsyncSession = Depends(get_session), owner_id: int = Depends(current_owner)
+) -> NicheRead:
+    niche = Niche(**payload.model_dump(), owner_id=owner_id)
     session.add(niche)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Niche already exists")
+    data_version.bump("niches", owner=owner_id)
     await session.refresh(niche)
     return niche
 
 
-@router.get("/", response_model=list[NicheRead])
-async def list_niches(session: AsyncSession = Depends(get_session)) -> list[NicheRead]:
-    result = await session.execute(select(Niche).where(Niche.is_active == True).order_by(Niche.id.asc()))
+@router.get("/", response_model=list[NicheRead], dependencies=[conditional("niches", per_owner=True)])
+async def list_niches(
+    session: AsyncSession = Depends(get_session), owner_id: int = Depends(current_owner)
+) -> list[NicheRead]:
+    result = await session.execute(
+        select(Niche).where(Niche.owner_id == owner_id, Niche.is_active == True).order_by(Niche.id.asc())
+    )
     return list(result.scalars().all())
 
 
 @router.delete("/{niche_id}")
-async def delete_niche(niche_id: int, session: AsyncSession = Depends(get_session)) -> dict:
+async def delete_niche(
+    niche_id: int, session: AsyncSession = Depends(get_session), owner_id: int = Depends(current_owner)
+) -> dict:
     niche = await session.get(Niche, niche_id)
-    if not niche:
+    if not niche or niche.owner_id != owner_id:
         raise HTTPException(status_code=404, detail="Niche not found")
-    
+
     niche.is_active = False
     await session.commit()
+    data_version.bump("niches", owner=owner_id)
     return {"status": "archived"}
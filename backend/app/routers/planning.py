@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import httpx
 
 from app.config import settings
+from app.services.llm_client import LLMError, llm_client
+from app.services.sse import sse_response
 
 
 router = APIRouter(prefix="/planning", tags=["planning"])
@@ -26,13 +28,32 @@ async def create_plan(payload: PlanRequest) -> PlanResponse:
     plan = await _call_openai(payload.brief)
     if not plan:
         raise HTTPException(status_code=502, detail="OpenAI returned no plan")
+    return _plan_response(payload.brief, plan)
+
+
+@router.post("/brief/stream")
+async def stream_plan(payload: PlanRequest, request: Request) -> StreamingResponse:
+    """SSE variant of /brief: ``token`` events, then a ``done`` PlanResponse."""
+    if not settings.openai_api_key:
+        raise HTTPException(status_code=503, detail="OpenAI key missing")
+
+    chunks = llm_client.stream_chat(
+        "openai", _build_payload(payload.brief), endpoint="planning.brief.stream", timeout=30.0
+    )
+    return sse_response(
+        request,
+        chunks,
+        lambda text: _plan_response(payload.brief, text.strip()).model_dump(),
+    )
+
+
+def _plan_response(brief: str, plan: str) -> PlanResponse:
     formatted = f"```\n{plan}\n```"
-    return PlanResponse(brief=payload.brief, plan=plan, formatted=formatted)
+    return PlanResponse(brief=brief, plan=plan, formatted=formatted)
 
 
-async def _call_openai(brief: str) -> str:
-    headers = {"Authorization": f"Bearer {settings.openai_api_key}"}
-    payload = {
+def _build_payload(brief: str) -> dict:
+    return {
         "model": settings.openai_model,
         "messages": [
             {"role": "system", "content": "You produce concise execution plans."},
@@ -41,12 +62,12 @@ async def _call_openai(brief: str) -> str:
         "temperature": 0.3,
         "max_tokens": 240,
     }
+
+
+async def _call_openai(brief: str) -> str:
+    payload = _build_payload(brief)
     try:
-        async with httpx.AsyncClient(timeout=12.0) as client:
-            response = await client.post("https://api.openai.com/v1/chat/completions", json=payload, headers=headers)
-        if response.status_code != 200:
-            return ""
-        data = response.json()
-        return data["choices"][0]["message"]["content"].strip()
-    except httpx.HTTPError:
+        content = await llm_client.chat("openai", payload, endpoint="planning.brief", timeout=12.0)
+    except LLMError:
         return ""
+    return content.strip()
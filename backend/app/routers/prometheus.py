@@ -0,0 +1,28 @@
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.instrumentation import request_metrics
+
+
+# Scrapers cannot send Telegram initData, so this router is mounted without the
+# initData dependency and guarded by its own bearer token instead.
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics(authorization: str | None = Header(default=None)) -> PlainTextResponse:
+    """Request timing, database queries and event-loop lag in Prometheus text format.
+
+    Disabled (404) unless METRICS_TOKEN is set; scrapers send it as
+    ``Authorization: Bearer <token>``.
+    """
+    if not settings.metrics_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # Compare bytes: compare_digest rejects non-ASCII str, and header values are latin-1.
+    supplied = (authorization or "").encode("latin-1")
+    if not hmac.compare_digest(supplied, f"Bearer {settings.metrics_token}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
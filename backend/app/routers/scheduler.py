@@ -1,50 +1,101 @@
-from datetime import datetime, time, timedelta
-from zoneinfo import ZoneInfo
-
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth import require_default_owner
 from app.bot import send_alert
 from app.config import settings
+from app.db import get_session
+from app.models import AccountPlatform, PostingWindow
+from app.schemas import PostingWindowCreate, PostingWindowRead, PostingWindowUpdate
+from app.scheduler_worker import scheduler_worker
+from app.services.data_version import conditional, data_version
+from app.services.posting_calendar import posting_calendar
 
 
 router = APIRouter(prefix="/scheduler", tags=["scheduler"])
-
-WINDOWS = [
-    {"label": "US Morning", "start": time(15, 0), "end": time(17, 0)},
-    {"label": "US Prime", "start": time(19, 0), "end": time(22, 0)},
-]
+# Shared data: anyone may read it, only the operator's (default) profile may change it.
+operator_only = [Depends(require_default_owner)]
 
 
 @router.get("/windows")
-async def get_windows() -> dict:
-    tz = ZoneInfo(settings.posting_timezone)
-    now = datetime.now(tz)
-    payload = []
-    for window in WINDOWS:
-        start_dt = datetime.combine(now.date(), window["start"], tzinfo=tz)
-        end_dt = datetime.combine(now.date(), window["end"], tzinfo=tz)
-        if now > end_dt:
-            start_dt += timedelta(days=1)
-            end_dt += timedelta(days=1)
-        alert_dt = start_dt - timedelta(minutes=15)
-        payload.append(
-            {
-                "label": window["label"],
-                "start": start_dt.isoformat(),
-                "end": end_dt.isoformat(),
-                "alert_at": alert_dt.isoformat(),
-            }
-        )
-    payload.sort(key=lambda item: item["start"])
-    return {"timezone": settings.posting_timezone, "windows": payload}
-
-
-@router.post("/notify")
+async def get_windows(
+    days: int = Query(default=1, ge=1, description="How many days ahead to list"),
+    limit: int = Query(default=50, ge=1, le=500),
+) -> dict:
+    days = min(days, settings.posting_calendar_days)
+    return {"timezone": settings.posting_timezone, "windows": posting_calendar.upcoming(days=days, limit=limit)}
+
+
+@router.post("/notify", dependencies=operator_only)
 async def notify_next_window(
     deep_link: str | None = Query(default=None, description="Marketing Lab deep link"),
 ) -> dict:
-    windows = (await get_windows())["windows"]
+    windows = posting_calendar.upcoming(days=settings.posting_calendar_days, limit=1)
+    if not windows:
+        raise HTTPException(status_code=404, detail="No upcoming posting windows")
     next_window = windows[0]
     message = f"Next window: {next_window['label']} ({next_window['start']} - {next_window['end']})"
     sent = await send_alert(message, deep_link=deep_link or settings.mini_app_link)
     return {"sent": sent, "window": next_window}
+
+
+@router.get("/posting-windows", response_model=list[PostingWindowRead], dependencies=[conditional("windows")])
+async def list_posting_windows(session: AsyncSession = Depends(get_session)) -> list[PostingWindowRead]:
+    result = await session.execute(select(PostingWindow).order_by(PostingWindow.start_time, PostingWindow.id))
+    return list(result.scalars().all())
+
+
+@router.post("/posting-windows", response_model=PostingWindowRead, dependencies=operator_only)
+async def create_posting_window(
+    payload: PostingWindowCreate, session: AsyncSession = Depends(get_session)
+) -> PostingWindowRead:
+    await _check_platform(session, payload.platform_id)
+    window = PostingWindow(**payload.model_dump())
+    session.add(window)
+    await session.commit()
+    await session.refresh(window)
+    await _windows_changed()
+    return window
+
+
+@router.patch("/posting-windows/{window_id}", response_model=PostingWindowRead, dependencies=operator_only)
+async def update_posting_window(
+    window_id: int,
+    payload: PostingWindowUpdate,
+    session: AsyncSession = Depends(get_session),
+) -> PostingWindowRead:
+    window = await session.get(PostingWindow, window_id)
+    if not window:
+        raise HTTPException(status_code=404, detail="Posting window not found")
+    update_data = payload.model_dump(exclude_unset=True)
+    if "platform_id" in update_data:
+        await _check_platform(session, update_data["platform_id"])
+    for key, value in update_data.items():
+        setattr(window, key, value)
+    await session.commit()
+    await session.refresh(window)
+    await _windows_changed()
+    return window
+
+
+@router.delete("/posting-windows/{window_id}", dependencies=operator_only)
+async def delete_posting_window(window_id: int, session: AsyncSession = Depends(get_session)) -> dict:
+    window = await session.get(PostingWindow, window_id)
+    if not window:
+        raise HTTPException(status_code=404, detail="Posting window not found")
+    await session.delete(window)
+    await session.commit()
+    await _windows_changed()
+    return {"status": "deleted"}
+
+
+async def _check_platform(session: AsyncSession, platform_id: int | None) -> None:
+    if platform_id is not None and await session.get(AccountPlatform, platform_id) is None:
+        raise HTTPException(status_code=404, detail="Platform not found")
+
+
+async def _windows_changed() -> None:
+    data_version.bump("windows")
+    await posting_calendar.reload()
+    scheduler_worker.sync_windows()
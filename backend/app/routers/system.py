@@ -2,30 +2,52 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_session, seed_defaults
-from app.models import TaskLog, Task, Niche, ModelStatus, AccountPlatform, BotUser
+from app.auth import current_owner
+from app.db import get_session, seed_defaults, seed_niches
+from app.scheduler_worker import scheduler_worker
+from app.services.data_version import data_version
+from app.services.posting_calendar import posting_calendar
+from app.services.profile import profile_service
+from app.services.reminders import reminders
+from app.models import TaskLog, Task, Niche, ModelStatus, AccountPlatform, BotUser, DailyStat, PostingWindow
 
 router = APIRouter(prefix="/system", tags=["system"])
 
 
 @router.post("/reset")
-async def reset_system(session: AsyncSession = Depends(get_session)):
+async def reset_system(session: AsyncSession = Depends(get_session), owner_id: int = Depends(current_owner)):
     """
-    DANGER: Wipes all data and reseeds defaults.
+    DANGER: Wipes the caller's tasks, logs and niches and reseeds defaults.
+
+    Shared tables (models, accounts, posting windows, bot users) are only
+    wiped when the caller is the default profile.
     """
+    shared = owner_id == await profile_service.default_id(session)
+
     # Delete in order of dependencies (child first)
-    await session.execute(delete(TaskLog))
-    await session.execute(delete(Task))
-    await session.execute(delete(Niche))
-    
+    await session.execute(delete(TaskLog).where(TaskLog.owner_id == owner_id))
+    await session.execute(delete(DailyStat).where(DailyStat.owner_id == owner_id))
+    await session.execute(delete(Task).where(Task.owner_id == owner_id))
+    await session.execute(delete(Niche).where(Niche.owner_id == owner_id))
+
     # Delete legacy/other tables
-    await session.execute(delete(ModelStatus))
-    await session.execute(delete(AccountPlatform))
-    await session.execute(delete(BotUser))
-    
+    if shared:
+        await session.execute(delete(ModelStatus))
+        await session.execute(delete(PostingWindow))
+        await session.execute(delete(AccountPlatform))
+        await session.execute(delete(BotUser))
+
+    await seed_niches(session, owner_id)
     await session.commit()
-    
+
     # Re-seed
-    await seed_defaults()
-    
+    await reminders.reload()
+    if shared:
+        await seed_defaults()
+        data_version.bump_all()
+        await posting_calendar.reload()
+        scheduler_worker.sync_windows()
+    else:
+        data_version.bump("tasks", "niches", "stats", owner=owner_id)
+
     return {"status": "system_reset_complete"}
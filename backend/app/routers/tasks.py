@@ -1,15 +1,33 @@
+import base64
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
+from app.auth import current_owner
 from app.config import settings
 from app.db import get_session
-from app.models import Task, TaskLog, TaskStatus, UserProfile
-from app.schemas import TaskCreate, TaskRead, TaskUpdate, TaskLogCreate, TaskLogResponse, UserProfileRead, StatsResponse
+from app.models import Niche, Task, TaskLog, TaskStatus
+from app.services import daily_stats, task_logging
+from app.services.profile import profile_service
+from app.services.reminders import reminders
+from app.services.task_logging import LogEntry
+from app.services.data_version import conditional, data_version
+from app.schemas import (
+    StatsResponse,
+    TaskCreate,
+    TaskLogBatchRequest,
+    TaskLogBatchResponse,
+    TaskLogCreate,
+    TaskLogResponse,
+    TaskLogResult,
+    TaskRead,
+    TaskUpdate,
+    UserProfileRead,
+)
 
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
@@ -21,12 +39,34 @@ def get_today_str() -> str:
     return datetime.now(tz).strftime("%Y-%m-%d")
 
 
+async def _owned_task(session: AsyncSession, owner_id: int, task_id: int) -> Task:
+    task = await session.get(Task, task_id)
+    if not task or task.owner_id != owner_id:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+async def _check_niche(session: AsyncSession, owner_id: int, niche_id: int | None) -> None:
+    if niche_id is None:
+        return
+    found = await session.execute(select(Niche.id).where(Niche.id == niche_id, Niche.owner_id == owner_id))
+    if found.first() is None:
+        raise HTTPException(status_code=404, detail="Niche not found")
+
+
 @router.post("/", response_model=TaskRead)
-async def create_task(payload: TaskCreate, session: AsyncSession = Depends(get_session)) -> TaskRead:
-    task = Task(**payload.model_dump())
+async def create_task(
+    payload: TaskCreate,
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(current_owner),
+) -> TaskRead:
+    await _check_niche(session, owner_id, payload.niche_id)
+    task = Task(**payload.model_dump(), owner_id=owner_id)
     session.add(task)
     await session.commit()
+    data_version.bump("tasks", "stats", owner=owner_id)
     await session.refresh(task)
+    reminders.sync_task(task)
     # Eager load niche for response
     result = await session.execute(
         select(Task).where(Task.id == task.id).options(selectinload(Task.niche))
@@ -34,74 +74,117 @@ async def create_task(payload: TaskCreate, session: AsyncSession = Depends(get_s
     return result.scalar_one()
 
 
-@router.get("/", response_model=list[TaskRead])
+TASK_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.task_type, Task.frequency, Task.scheduled_time,
+    Task.week_days, Task.content_link, Task.niche_id, Task.is_archived, Task.created_at,
+)
+NICHE_COLUMNS = (
+    Niche.id, Niche.name, Niche.description, Niche.color, Niche.icon, Niche.is_active, Niche.created_at,
+)
+
+
+def _encode_cursor(created_at: datetime, task_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{task_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, task_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get(
+    "/",
+    response_model=list[TaskRead],
+    dependencies=[conditional("tasks", "niches", scope=get_today_str, per_owner=True)],
+)
 async def list_tasks(
+    response: Response,
     niche_id: int | None = None, 
     archived: bool = False,
-    session: AsyncSession = Depends(get_session)
-) -> list[TaskRead]:
-    query = select(Task).options(selectinload(Task.niche))
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(current_owner),
+) -> list[dict]:
+    """Tasks newest first, with niche and done-today flag in a single query.
+
+    Pass ``limit`` to page; the next page's ``cursor`` is returned in the
+    ``X-Next-Cursor`` header (absent on the last page).
+    """
+    today_log = aliased(TaskLog)
+    query = (
+        select(*TASK_COLUMNS, *NICHE_COLUMNS, today_log.id.is_not(None).label("is_done_today"))
+        .outerjoin(Niche, Niche.id == Task.niche_id)
+        .outerjoin(
+            today_log,
+            (today_log.task_id == Task.id)
+            & (today_log.date == get_today_str())
+            & (today_log.status == TaskStatus.DONE),
+        )
+        .where(Task.owner_id == owner_id)
+    )
     
     if niche_id:
         query = query.where(Task.niche_id == niche_id)
     
     if not archived:
         query = query.where(Task.is_archived == False)
-        
-    result = await session.execute(query.order_by(Task.created_at.desc()))
-    tasks = list(result.scalars().all())
 
-    # Calculate is_done_today for each task
-    today_str = get_today_str()
-    task_ids = [t.id for t in tasks]
-    
-    if not task_ids:
-        return []
-
-    logs_result = await session.execute(
-        select(TaskLog.task_id)
-        .where(TaskLog.task_id.in_(task_ids))
-        .where(TaskLog.date == today_str)
-        .where(TaskLog.status == TaskStatus.DONE)
-    )
-    done_task_ids = set(logs_result.scalars().all())
-
-    # Map to schema manually since we have computed fields
-    response = []
-    for t in tasks:
-        t_read = TaskRead.model_validate(t)
-        t_read.is_done_today = t.id in done_task_ids
-        response.append(t_read)
-
-    return response
-
-
-@router.get("/stats", response_model=StatsResponse)
-async def get_stats(session: AsyncSession = Depends(get_session)) -> StatsResponse:
+    if cursor:
+        query = query.where(tuple_(Task.created_at, Task.id) < tuple_(*_decode_cursor(cursor)))
+
+    query = query.order_by(Task.created_at.desc(), Task.id.desc())
+    if limit:
+        query = query.limit(limit + 1)
+
+    rows = (await session.execute(query)).all()
+    has_more = bool(limit) and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+
+    # Plain dicts straight from the row tuples; no ORM objects are hydrated
+    n_task = len(TASK_COLUMNS)
+    task_keys = [c.key for c in TASK_COLUMNS]
+    niche_keys = [c.key for c in NICHE_COLUMNS]
+    items = []
+    for row in rows:
+        item = dict(zip(task_keys, row[:n_task]))
+        item["niche"] = dict(zip(niche_keys, row[n_task:-1])) if row[n_task] is not None else None
+        item["is_done_today"] = row[-1]
+        items.append(item)
+
+    if has_more:
+        response.headers["X-Next-Cursor"] = _encode_cursor(items[-1]["created_at"], items[-1]["id"])
+    return items
+
+
+@router.get(
+    "/stats",
+    response_model=StatsResponse,
+    dependencies=[conditional("stats", "profile", scope=get_today_str, per_owner=True)],
+)
+async def get_stats(
+    session: AsyncSession = Depends(get_session), owner_id: int = Depends(current_owner)
+) -> StatsResponse:
     today_str = get_today_str()
     
     # Total active tasks (not archived)
-    total_active_query = select(func.count(Task.id)).where(Task.is_archived == False)
+    total_active_query = select(func.count(Task.id)).where(Task.owner_id == owner_id, Task.is_archived == False)
     total_active = (await session.execute(total_active_query)).scalar_one()
     
-    # Completed today
-    completed_today_query = select(func.count(TaskLog.id)).where(
-        TaskLog.date == today_str,
-        TaskLog.status == TaskStatus.DONE
-    )
-    completed_today = (await session.execute(completed_today_query)).scalar_one()
+    # Completed counts come from the daily_stats rollup
+    completed_today = await daily_stats.completed_on(session, owner_id, today_str)
     
-    # Completed last 7 days
     tz = ZoneInfo(settings.timezone)
-    seven_days_ago = (datetime.now(tz) - timedelta(days=7)).strftime("%Y-%m-%d")
-    completed_last_7_days_query = select(func.count(TaskLog.id)).where(
-        TaskLog.date >= seven_days_ago,
-        TaskLog.status == TaskStatus.DONE
-    )
-    completed_last_7_days = (await session.execute(completed_last_7_days_query)).scalar_one()
+    windows = await daily_stats.completed_windows(session, owner_id, datetime.now(tz).date(), (7, 30, 90, 365))
     
     # Streak
-    profile = await get_profile(session)
+    profile = await profile_service.get(session, owner_id)
     streak = profile.streak
 
     if profile.last_activity_date:
@@ -118,52 +201,44 @@ async def get_stats(session: AsyncSession = Depends(get_session)) -> StatsRespon
         completed_today=completed_today,
         total_active_today=total_active,
         completion_rate_today=rate,
-        completed_last_7_days=completed_last_7_days,
+        completed_last_7_days=windows[7],
+        completed_last_30_days=windows[30],
+        completed_last_90_days=windows[90],
+        completed_last_365_days=windows[365],
         streak=streak
     )
 
 
-@router.get("/profile", response_model=UserProfileRead)
-async def get_profile_endpoint(session: AsyncSession = Depends(get_session)) -> UserProfileRead:
-    return await get_profile(session)
+@router.get("/profile", response_model=UserProfileRead, dependencies=[conditional("profile", per_owner=True)])
+async def get_profile_endpoint(
+    session: AsyncSession = Depends(get_session), owner_id: int = Depends(current_owner)
+) -> UserProfileRead:
+    return await profile_service.get(session, owner_id)
 
 
 class ProfileUpdate(TaskLogCreate): # Re-using pydantic model base? No, create new one.
     pass
 
 from app.schemas import UserProfileRead
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 class UserProfileUpdate(BaseModel):
+    # telegram_chat_id is the identity key; it only ever comes from verified initData.
+    model_config = ConfigDict(extra="forbid")
+
     xp: int | None = None
     inventory: str | None = None
     achievements: str | None = None
-    telegram_chat_id: str | None = None
 
 @router.patch("/profile", response_model=UserProfileRead)
 async def update_profile(
     payload: UserProfileUpdate, 
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(current_owner),
 ) -> UserProfileRead:
-    profile = await get_profile(session)
-    
-    update_data = payload.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(profile, key, value)
-        
+    profile = await profile_service.update(session, owner_id, payload.model_dump(exclude_unset=True))
     await session.commit()
-    await session.refresh(profile)
-    return profile
-
-
-async def get_profile(session: AsyncSession) -> UserProfile:
-    result = await session.execute(select(UserProfile).limit(1))
-    profile = result.scalar_one_or_none()
-    if not profile:
-        profile = UserProfile(level=1, xp=0, streak=0, inventory="[]", achievements="[]")
-        session.add(profile)
-        await session.commit()
-        await session.refresh(profile)
+    data_version.bump("profile", owner=owner_id)
     return profile
 
 
@@ -171,18 +246,21 @@ async def get_profile(session: AsyncSession) -> UserProfile:
 async def update_task(
     task_id: int, 
     payload: TaskUpdate, 
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(current_owner),
 ) -> TaskRead:
-    task = await session.get(Task, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    task = await _owned_task(session, owner_id, task_id)
         
     update_data = payload.model_dump(exclude_unset=True)
+    if "niche_id" in update_data:
+        await _check_niche(session, owner_id, update_data["niche_id"])
     for key, value in update_data.items():
         setattr(task, key, value)
         
     await session.commit()
+    data_version.bump("tasks", "stats", owner=owner_id)
     await session.refresh(task)
+    reminders.sync_task(task)
     
     # Eager load niche for response
     result = await session.execute(
@@ -192,98 +270,53 @@ async def update_task(
 
 
 @router.delete("/{task_id}")
-async def delete_task(task_id: int, session: AsyncSession = Depends(get_session)):
-    task = await session.get(Task, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+async def delete_task(
+    task_id: int, session: AsyncSession = Depends(get_session), owner_id: int = Depends(current_owner)
+):
+    task = await _owned_task(session, owner_id, task_id)
     
+    await daily_stats.discount_task(session, owner_id, task_id)
     await session.delete(task)
     await session.commit()
+    data_version.bump("tasks", "stats", owner=owner_id)
+    reminders.remove(task_id)
     return {"status": "deleted"}
 
 
+@router.post("/log/batch", response_model=TaskLogBatchResponse)
+async def log_tasks_batch(
+    payload: TaskLogBatchRequest,
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(current_owner),
+) -> TaskLogBatchResponse:
+    """Applies many log entries in one transaction and returns the final profile."""
+    entries = [LogEntry(task_id=e.task_id, status=e.status, note=e.note) for e in payload.entries]
+    profile = await _apply_and_commit(session, owner_id, entries)
+    return TaskLogBatchResponse(
+        results=[TaskLogResult(task_id=e.task_id, status=e.status) for e in payload.entries],
+        profile=profile,
+    )
+
+
 @router.post("/{task_id}/log", response_model=TaskLogResponse)
 async def log_task(
     task_id: int,
     status: str,
     note: str | None = None,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    owner_id: int = Depends(current_owner),
 ) -> TaskLogResponse:
-    task = await session.get(Task, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-        
-    today_str = get_today_str()
-    
-    # Check existing log
-    result = await session.execute(
-        select(TaskLog)
-        .where(TaskLog.task_id == task_id)
-        .where(TaskLog.date == today_str)
-    )
-    existing_log = result.scalars().first()
-    
-    profile = None
-    
-    if status == TaskStatus.DONE:
-        if not existing_log:
-            # Create log
-            log = TaskLog(
-                task_id=task_id, 
-                status=status, 
-                date=today_str, 
-                completed_at=datetime.utcnow()
-            )
-            session.add(log)
-            
-            # Gamification
-            result = await session.execute(select(UserProfile).limit(1))
-            profile = result.scalar_one_or_none()
-            if not profile:
-                profile = UserProfile(level=1, xp=0, streak=0)
-                session.add(profile)
-            
-            # XP Logic (+10 per task)
-            profile.xp += 10
-            
-            # Level Logic (100 XP per level)
-            required_xp = profile.level * 100
-            while profile.xp >= required_xp:
-                profile.xp -= required_xp
-                profile.level += 1
-                required_xp = profile.level * 100
-            
-            # Streak Logic
-            if profile.last_activity_date != today_str:
-                current_date = datetime.strptime(today_str, "%Y-%m-%d").date()
-                if profile.last_activity_date:
-                    last_date = datetime.strptime(profile.last_activity_date, "%Y-%m-%d").date()
-                    if last_date == current_date - timedelta(days=1):
-                        profile.streak += 1
-                    elif last_date < current_date - timedelta(days=1):
-                        profile.streak = 1
-                else:
-                    profile.streak = 1
-                profile.last_activity_date = today_str
-        else:
-            # Already logged, just ensure status is done
-            existing_log.status = status
-            
-            # Fetch profile for response
-            result = await session.execute(select(UserProfile).limit(1))
-            profile = result.scalar_one_or_none()
-
-    else: # Undo/Pending
-        if existing_log:
-            await session.delete(existing_log)
-        
-        # Fetch profile for response
-        result = await session.execute(select(UserProfile).limit(1))
-        profile = result.scalar_one_or_none()
+    profile = await _apply_and_commit(session, owner_id, [LogEntry(task_id=task_id, status=status, note=note)])
+    return TaskLogResponse(status=status, profile=profile)
+
+
+async def _apply_and_commit(session: AsyncSession, owner_id: int, entries: list[LogEntry]) -> UserProfileRead:
+    try:
+        profile = await task_logging.apply_logs(session, owner_id, entries, get_today_str())
+    except task_logging.TaskNotFoundError as exc:
+        detail = "Task not found" if len(entries) == 1 else f"Tasks not found: {exc.task_ids}"
+        raise HTTPException(status_code=404, detail=detail)
 
     await session.commit()
-    
-    if profile:
-        await session.refresh(profile)
-        
-    return TaskLogResponse(status=status, profile=profile)
+    data_version.bump("tasks", "stats", "profile", owner=owner_id)
+    return profile
@@ -0,0 +1,38 @@
+import hmac
+import json
+
+from aiogram.types import Update
+from fastapi import APIRouter, Header, HTTPException, Request
+from pydantic import ValidationError
+
+from app import bot_runner
+from app.config import settings
+
+
+router = APIRouter(prefix="/telegram", tags=["telegram"])
+
+
+@router.post("/webhook", include_in_schema=False)
+async def telegram_webhook(
+    request: Request,
+    secret_token: str | None = Header(default=None, alias="X-Telegram-Bot-Api-Secret-Token"),
+) -> dict:
+    """Receives Telegram updates when TELEGRAM_MODE=webhook.
+
+    The update is acknowledged immediately and handled in the background so
+    slow handlers never make Telegram retry.
+    """
+    if settings.telegram_mode != "webhook" or not bot_runner.bot:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # Without a configured secret anyone could post forged updates, so refuse them all.
+    if not settings.telegram_webhook_secret or not hmac.compare_digest(
+        secret_token or "", settings.telegram_webhook_secret
+    ):
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+
+    try:
+        update = Update.model_validate(await request.json(), context={"bot": bot_runner.bot})
+    except (json.JSONDecodeError, UnicodeDecodeError, ValidationError):
+        raise HTTPException(status_code=400, detail="Invalid update")
+    bot_runner.dispatch_update(update)
+    return {"ok": True}
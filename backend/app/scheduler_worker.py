@@ -1,53 +1,57 @@
-import asyncio
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from app.bot import send_alert
 from app.config import settings
-from app.routers.scheduler import WINDOWS
+from app.services.posting_calendar import posting_calendar
+from app.services.scheduler_engine import DailyRule, scheduler_engine
 
 
 class SchedulerWorker:
-    def __init__(self) -> None:
-        self._task: asyncio.Task | None = None
-        self._sent: set[str] = set()
-        self._current_date: str | None = None
-
-    def start(self) -> None:
-        if self._task:
-            return
-        self._task = asyncio.create_task(self._run_loop())
+    """Registers posting-window alerts with the scheduler engine and runs it.
 
-    async def _run_loop(self) -> None:
-        while True:
-            await self._check_windows()
-            await asyncio.sleep(60)
+    Task reminders are registered separately by app.services.reminders.
+    """
 
-    async def _check_windows(self) -> None:
+    def __init__(self) -> None:
+        self._window_jobs: set[str] = set()
+
+    async def start(self) -> None:
+        await posting_calendar.reload()
+        self.sync_windows()
+        scheduler_engine.start()
+
+    async def stop(self) -> None:
+        await scheduler_engine.stop()
+
+    def sync_windows(self) -> None:
+        """Mirrors ``posting_calendar.windows`` into alert jobs after a reload."""
+        wanted = set()
+        for window in posting_calendar.windows.values():
+            job_id = f"window:{window.id}"
+            wanted.add(job_id)
+            rule = DailyRule(
+                window.start,
+                settings.posting_timezone,
+                window.weekdays,
+                offset=-timedelta(minutes=window.alert_minutes),
+            )
+            scheduler_engine.schedule(job_id, rule, self._window_alert)
+        for job_id in self._window_jobs - wanted:
+            scheduler_engine.cancel(job_id)
+        self._window_jobs = wanted
+
+    async def _window_alert(self, job_id: str, occurrence: datetime) -> bool:
+        window = posting_calendar.windows.get(int(job_id.split(":", 1)[1]))
+        if window is None:
+            return True
         tz = ZoneInfo(settings.posting_timezone)
-        now = datetime.now(tz)
-        today = now.date().isoformat()
-        if self._current_date != today:
-            self._sent.clear()
-            self._current_date = today
-
-        for window in WINDOWS:
-            start_dt = datetime.combine(now.date(), window["start"], tzinfo=tz)
-            end_dt = datetime.combine(now.date(), window["end"], tzinfo=tz)
-            if now > start_dt:
-                start_dt += timedelta(days=1)
-                end_dt += timedelta(days=1)
-            alert_dt = start_dt - timedelta(minutes=15)
-
-            key = f"{window['label']}:{alert_dt.date().isoformat()}"
-            if key in self._sent:
-                continue
-
-            if alert_dt <= now < alert_dt + timedelta(minutes=1):
-                message = f"Next window: {window['label']} ({start_dt.isoformat()} - {end_dt.isoformat()})"
-                sent = await send_alert(message, deep_link=settings.mini_app_link)
-                if sent:
-                    self._sent.add(key)
+        start_dt = (occurrence + timedelta(minutes=window.alert_minutes)).astimezone(tz)
+        end_dt = start_dt + window.duration
+        message = f"Next window: {window.label} ({start_dt.isoformat()} - {end_dt.isoformat()})"
+        return await send_alert(
+            message, deep_link=settings.mini_app_link, dedupe_key=f"{job_id}@{occurrence.isoformat()}"
+        )
 
 
 scheduler_worker = SchedulerWorker()
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 # --- Niches ---
@@ -42,6 +42,26 @@ class TaskLogResponse(BaseModel):
     profile: Optional[UserProfileRead] = None
 
 
+class TaskLogEntry(BaseModel):
+    task_id: int
+    status: str
+    note: Optional[str] = None
+
+
+class TaskLogBatchRequest(BaseModel):
+    entries: list[TaskLogEntry] = Field(min_length=1, max_length=500)
+
+
+class TaskLogResult(BaseModel):
+    task_id: int
+    status: str
+
+
+class TaskLogBatchResponse(BaseModel):
+    results: list[TaskLogResult]
+    profile: Optional[UserProfileRead] = None
+
+
 # --- Tasks ---
 
 class TaskBase(BaseModel):
@@ -82,6 +102,9 @@ class StatsResponse(BaseModel):
     total_active_today: int
     completion_rate_today: float
     completed_last_7_days: int
+    completed_last_30_days: int = 0
+    completed_last_90_days: int = 0
+    completed_last_365_days: int = 0
     streak: int
 
 
@@ -135,3 +158,44 @@ class AccountPlatformRead(AccountPlatformBase):
 class AccountPlatformUpdate(BaseModel):
     accounts: Optional[int] = None
     status: Optional[str] = None
+
+
+HHMM_PATTERN = r"^([01]\d|2[0-3]):[0-5]\d$"
+WEEK_DAYS_PATTERN = r"^[1-7](,[1-7])*$"
+
+
+class PostingWindowBase(BaseModel):
+    label: str = Field(min_length=1, max_length=64)
+    platform_id: Optional[int] = None
+    start_time: str = Field(pattern=HHMM_PATTERN)
+    end_time: str = Field(pattern=HHMM_PATTERN)
+    week_days: Optional[str] = Field(default=None, pattern=WEEK_DAYS_PATTERN)
+    alert_minutes: int = Field(default=15, ge=0, le=720)
+    is_active: bool = True
+
+
+class PostingWindowCreate(PostingWindowBase):
+    pass
+
+
+class PostingWindowRead(PostingWindowBase):
+    id: int
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PostingWindowUpdate(BaseModel):
+    label: Optional[str] = Field(default=None, min_length=1, max_length=64)
+    platform_id: Optional[int] = None
+    start_time: Optional[str] = Field(default=None, pattern=HHMM_PATTERN)
+    end_time: Optional[str] = Field(default=None, pattern=HHMM_PATTERN)
+    week_days: Optional[str] = Field(default=None, pattern=WEEK_DAYS_PATTERN)
+    alert_minutes: Optional[int] = Field(default=None, ge=0, le=720)
+    is_active: Optional[bool] = None
+
+    @field_validator("label", "start_time", "end_time", "alert_minutes", "is_active")
+    @classmethod
+    def _not_null(cls, value):
+        # These may be omitted, but an explicit null would reach a required column.
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
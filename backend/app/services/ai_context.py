@@ -1,70 +1,118 @@
+"""Life OS context for assistant system prompts.
+
+The niche and task sections are rendered once per owner and reused until
+``data_version`` reports a change to that owner's niches or tasks. The prompt is laid out
+static-first: fixed instructions, then the cached sections, and the current
+time last. Consecutive prompts therefore share a long identical prefix,
+which provider-side prompt caching can reuse.
+
+Sections are held to ``ai_context_token_budget`` (estimated at ~4 characters
+per token). Rows are rendered in a fixed order and cut at the budget with an
+"and N more" line, so the same data always produces the same prompt.
+"""
+from collections import OrderedDict
 from datetime import datetime
+from zoneinfo import ZoneInfo
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Niche, Task, TaskStatus
+from app.config import settings
+from app.models import Niche, Task
+from app.services.data_version import data_version
+
+
+CHARS_PER_TOKEN = 4
+CONTEXT_RESOURCES = ("niches", "tasks")
+MAX_CACHED_OWNERS = 1024
+
+PROMPT_HEADER = (
+    "You are the Life OS Assistant.\n\n"
+    "Your Goal: Help the user manage their life, tasks, and goals. Be proactive, concise, and supportive.\n"
+    "You have access to the user's Niches (Life Areas) and Tasks.\n"
+    "IMPORTANT: ALWAYS respond in Russian.\n\n"
+    "INSTRUCTIONS:\n"
+    "1. Speak Russian. Be cool, modern, and concise.\n"
+    "2. If the user wants to add a task, ask for clarification if the Niche is unclear.\n"
+    "3. If the user reports completing a task, congratulate them and ask if they want to log it.\n"
+    "4. Provide brief, actionable advice based on their Niches.\n"
+    "5. You are a 'Second Pilot'. Be helpful but not annoying.\n\n"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _fit(lines: list[str], budget: int) -> list[str]:
+    """Keeps lines in order while they fit ``budget`` tokens, then notes the rest."""
+    kept: list[str] = []
+    used = 0
+    for index, line in enumerate(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            kept.append(f"- ... and {len(lines) - index} more")
+            break
+        kept.append(line)
+        used += cost
+    return kept
 
 
 class AIContextService:
-    def __init__(self, session: AsyncSession):
-        self.session = session
-
-    async def get_system_prompt(self) -> str:
-        """Builds the dynamic system prompt with Life OS context."""
-        now = datetime.now()
-        date_str = now.strftime("%A, %d %B %Y")
-        time_str = now.strftime("%H:%M")
-
-        niches_text = await self._get_niches_context()
-        tasks_text = await self._get_tasks_context()
-
-        prompt = (
-            f"You are the Life OS Assistant. Current time: {time_str} on {date_str}.\n\n"
-            "Your Goal: Help the user manage their life, tasks, and goals. Be proactive, concise, and supportive.\n"
-            "You have access to the user's Niches (Life Areas) and Tasks.\n"
-            "IMPORTANT: ALWAYS respond in Russian.\n\n"
-            f"=== ACTIVE NICHES ===\n{niches_text}\n\n"
-            f"=== PENDING TASKS ===\n{tasks_text}\n\n"
-            "INSTRUCTIONS:\n"
-            "1. Speak Russian. Be cool, modern, and concise.\n"
-            "2. If the user wants to add a task, ask for clarification if the Niche is unclear.\n"
-            "3. If the user reports completing a task, congratulate them and ask if they want to log it.\n"
-            "4. Provide brief, actionable advice based on their Niches.\n"
-            "5. You are a 'Second Pilot'. Be helpful but not annoying.\n"
-        )
-        return prompt
-
-    async def _get_niches_context(self) -> str:
-        result = await self.session.execute(select(Niche).where(Niche.is_active == True))
-        niches = result.scalars().all()
-        if not niches:
-            return "No niches defined yet."
-        
-        lines = []
-        for n in niches:
-            lines.append(f"- {n.name}: {n.description or ''}")
-        return "\n".join(lines)
-
-    async def _get_tasks_context(self) -> str:
-        # Get pending tasks
-        result = await self.session.execute(
-            select(Task).where(
-                Task.is_archived == False,
-                # We could filter by status but Task table doesn't have status, TaskLog does.
-                # Actually, our new model logic: Task is the definition. 
-                # We need to know if it's 'due' today. 
-                # For now, just list all non-archived tasks.
-            ).limit(10)
+    def __init__(self) -> None:
+        self._sections: OrderedDict[int, tuple[str, str]] = OrderedDict()  # owner id -> (version, sections)
+        self.renders = 0
+
+    async def get_sections(self, session: AsyncSession, owner_id: int) -> str:
+        """The owner's rendered niche and task sections, rebuilt only after a change."""
+        version = data_version.etag(CONTEXT_RESOURCES, owner=owner_id)
+        cached = self._sections.get(owner_id)
+        if cached is None or cached[0] != version:
+            cached = (version, await self._render(session, owner_id))
+            self.renders += 1
+        self._sections[owner_id] = cached
+        self._sections.move_to_end(owner_id)
+        if len(self._sections) > MAX_CACHED_OWNERS:
+            self._sections.popitem(last=False)
+        return cached[1]
+
+    async def get_system_prompt(self, session: AsyncSession, owner_id: int) -> str:
+        now = datetime.now(ZoneInfo(settings.timezone))
+        sections = await self.get_sections(session, owner_id)
+        return f"{PROMPT_HEADER}{sections}\nCurrent time: {now:%H:%M} on {now:%A, %d %B %Y}.\n"
+
+    async def _render(self, session: AsyncSession, owner_id: int) -> str:
+        niches = (
+            await session.execute(
+                select(Niche.name, Niche.description)
+                .where(Niche.owner_id == owner_id, Niche.is_active == True)  # noqa: E712
+                .order_by(Niche.id)
+            )
+        ).all()
+        tasks = (
+            await session.execute(
+                select(Task.task_type, Task.title, Task.scheduled_time, Niche.name)
+                .outerjoin(Niche, Task.niche_id == Niche.id)
+                .where(Task.owner_id == owner_id, Task.is_archived == False)  # noqa: E712
+                .order_by(Task.id)
+            )
+        ).all()
+
+        niche_lines = [f"- {name}: {description}" if description else f"- {name}" for name, description in niches]
+        task_lines = [
+            f"- [{task_type}] {title} ({niche or 'No niche'}{', ' + scheduled_time if scheduled_time else ''})"
+            for task_type, title, scheduled_time, niche in tasks
+        ]
+
+        budget = settings.ai_context_token_budget
+        # Niches are few and anchor the advice; tasks get whatever is left.
+        niche_lines = _fit(niche_lines, budget // 4) if niche_lines else ["No niches defined yet."]
+        remaining = budget - sum(estimate_tokens(line) + 1 for line in niche_lines)
+        task_lines = _fit(task_lines, remaining) if task_lines else ["Нет активных задач."]
+        return (
+            "=== ACTIVE NICHES ===\n" + "\n".join(niche_lines) + "\n\n"
+            "=== PENDING TASKS ===\n" + "\n".join(task_lines) + "\n"
         )
-        tasks = result.scalars().all()
-        if not tasks:
-            return "Нет активных задач."
-
-        lines = []
-        for t in tasks:
-            niche_name = "Unknown"
-            # Simple lookup if we loaded relationship, but here we just have ID
-            # In a real app we'd join Niche. For now, prompt is fine with ID.
-            lines.append(f"- [{t.task_type}] {t.title} (Niche ID: {t.niche_id})")
-        return "\n".join(lines)
+
+
+ai_context = AIContextService()
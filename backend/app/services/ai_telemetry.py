@@ -0,0 +1,183 @@
+"""Per-call telemetry for upstream AI requests.
+
+``record`` is called by ``llm_client`` (xAI/OpenAI) and the Gemini image
+route for every completion. Each call carries provider, model, endpoint,
+token usage, latency and status. Calls are aggregated in memory per
+(provider, model, endpoint) for ``/metrics/ai``. Raw rows are buffered and
+written to the ``ai_calls`` table every ``ai_metrics_flush_interval``
+seconds, so recording never touches the database on the request path.
+"""
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, select
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models import AICall
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SAMPLES = 1024
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))], 1)
+
+
+@dataclass
+class _Aggregate:
+    calls: int = 0
+    errors: int = 0
+    cached: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_SAMPLES))
+
+    def summary(self) -> dict:
+        samples = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cached": self.cached,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms_p50": percentile(samples, 0.50),
+            "latency_ms_p95": percentile(samples, 0.95),
+            "latency_ms_p99": percentile(samples, 0.99),
+        }
+
+
+class AITelemetry:
+    def __init__(self) -> None:
+        self._aggregates: dict[tuple[str, str, str], _Aggregate] = {}
+        self._pending: deque[dict] = deque(maxlen=settings.ai_metrics_buffer_size)
+        self._worker: asyncio.Task | None = None
+        self.started_at = datetime.utcnow()
+        self.dropped = 0
+
+    def record(
+        self,
+        provider: str,
+        model: str | None,
+        endpoint: str | None,
+        *,
+        latency_ms: float,
+        status: str = "ok",
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+    ) -> None:
+        """``status`` is ``ok``, ``cached``, ``cancelled`` or ``error[:<http status>]``."""
+        model = model or "unknown"
+        endpoint = endpoint or "unnamed"
+        aggregate = self._aggregates.setdefault((provider, model, endpoint), _Aggregate())
+        aggregate.calls += 1
+        if status == "cached":
+            aggregate.cached += 1
+        else:
+            # Cache hits would drag the upstream latency percentiles down.
+            aggregate.latencies.append(latency_ms)
+        if status.startswith("error"):
+            aggregate.errors += 1
+        aggregate.prompt_tokens += prompt_tokens
+        aggregate.completion_tokens += completion_tokens
+
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1  # the oldest unflushed row is evicted
+        self._pending.append(
+            {
+                "created_at": datetime.utcnow(),
+                "provider": provider,
+                "model": model,
+                "endpoint": endpoint,
+                "status": status,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency_ms": round(latency_ms, 2),
+            }
+        )
+
+    async def start(self) -> None:
+        if self._worker:
+            return
+        cutoff = datetime.utcnow() - timedelta(days=settings.ai_metrics_retention_days)
+        async with SessionLocal() as session:
+            await session.execute(delete(AICall).where(AICall.created_at < cutoff))
+            await session.commit()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.ai_metrics_flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush AI call metrics")
+
+    async def flush(self) -> int:
+        rows = list(self._pending)
+        self._pending.clear()
+        if not rows:
+            return 0
+        async with SessionLocal() as session:
+            await session.execute(insert(AICall), rows)
+            await session.commit()
+        return len(rows)
+
+    def summary(self) -> list[dict]:
+        return [
+            {"provider": provider, "model": model, "endpoint": endpoint, **aggregate.summary()}
+            for (provider, model, endpoint), aggregate in sorted(self._aggregates.items())
+        ]
+
+    async def history(self, hours: int) -> list[dict]:
+        """Aggregates persisted calls from the last ``hours`` hours."""
+        await self.flush()
+        since = datetime.utcnow() - timedelta(hours=hours)
+        async with SessionLocal() as session:
+            result = await session.execute(
+                select(
+                    AICall.provider,
+                    AICall.model,
+                    AICall.endpoint,
+                    AICall.status,
+                    AICall.prompt_tokens,
+                    AICall.completion_tokens,
+                    AICall.latency_ms,
+                ).where(AICall.created_at >= since)
+            )
+            aggregates: dict[tuple[str, str, str], _Aggregate] = {}
+            for provider, model, endpoint, status, prompt_tokens, completion_tokens, latency_ms in result.all():
+                aggregate = aggregates.get((provider, model, endpoint))
+                if aggregate is None:
+                    aggregate = aggregates[(provider, model, endpoint)] = _Aggregate(latencies=deque())
+                aggregate.calls += 1
+                aggregate.errors += status.startswith("error")
+                aggregate.cached += status == "cached"
+                aggregate.prompt_tokens += prompt_tokens
+                aggregate.completion_tokens += completion_tokens
+                if status != "cached":
+                    aggregate.latencies.append(latency_ms)
+        return [
+            {"provider": provider, "model": model, "endpoint": endpoint, **aggregate.summary()}
+            for (provider, model, endpoint), aggregate in sorted(aggregates.items())
+        ]
+
+
+ai_telemetry = AITelemetry()
@@ -0,0 +1,139 @@
+"""Batched, bounded ingestion of bot-originated tasks.
+
+``handle_message`` used to open a session and commit once per Telegram
+message. Messages now go into a bounded queue; a single writer drains it and
+inserts up to ``batch_size`` tasks per transaction, waiting at most
+``flush_interval`` for a batch to fill. ``submit`` resolves only after the
+batch has committed, so the bot replies once the task is durable. A full
+queue makes ``submit`` wait (backpressure) rather than drop messages.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import insert
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models import Task, TaskType
+from app.services.data_version import data_version
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Pending:
+    values: dict
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class TaskIngestQueue:
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float) -> None:
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue[_Pending] | None = None
+        self._worker: asyncio.Task | None = None
+        self._stats = {
+            "submitted": 0,
+            "inserted": 0,
+            "failed": 0,
+            "batches": 0,
+            "blocked_submits": 0,
+            "max_batch": 0,
+            "last_flush_ms": 0.0,
+            "max_latency_ms": 0.0,
+        }
+
+    def start(self) -> None:
+        if self._worker:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flushes whatever is queued, then stops the writer."""
+        if not self._worker:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def submit(self, title: str, owner_id: int) -> int:
+        """Queues a one-time task for ``owner_id`` and returns its id once it is committed."""
+        if not self._worker:
+            raise RuntimeError("Task ingest queue is not running")
+        future = asyncio.get_running_loop().create_future()
+        item = _Pending({"title": title, "task_type": TaskType.ONE_TIME, "niche_id": None, "owner_id": owner_id}, future)
+        if self._queue.full():
+            self._stats["blocked_submits"] += 1
+        await self._queue.put(item)
+        self._stats["submitted"] += 1
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: list[_Pending]) -> None:
+        started = time.perf_counter()
+        try:
+            async with SessionLocal() as session:
+                result = await session.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), [item.values for item in batch])
+                ids = list(result.scalars())
+                await session.commit()
+        except Exception as exc:
+            logger.exception("Failed to insert %s bot tasks", len(batch))
+            self._stats["failed"] += len(batch)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+
+        for owner_id in {item.values["owner_id"] for item in batch}:
+            data_version.bump("tasks", "stats", owner=owner_id)
+        now = time.perf_counter()
+        self._stats["batches"] += 1
+        self._stats["inserted"] += len(batch)
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+        self._stats["last_flush_ms"] = round((now - started) * 1000, 2)
+        for item, task_id in zip(batch, ids):
+            self._stats["max_latency_ms"] = max(self._stats["max_latency_ms"], round((now - item.enqueued_at) * 1000, 2))
+            if not item.future.done():
+                item.future.set_result(task_id)
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_capacity": self.maxsize,
+            "running": self._worker is not None,
+        }
+
+
+task_ingest = TaskIngestQueue(
+    maxsize=settings.bot_ingest_queue_size,
+    batch_size=settings.bot_ingest_batch_size,
+    flush_interval=settings.bot_ingest_flush_interval,
+)
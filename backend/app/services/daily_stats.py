@@ -0,0 +1,99 @@
+"""Incrementally maintained per-day completion counts.
+
+``daily_stats`` holds one row per owner and date with the number of DONE task logs,
+so dashboard windows are a short primary-key range scan instead of COUNTs
+over the ever-growing ``task_logs`` table. Every path that creates,
+re-statuses or deletes a DONE log must call :func:`bump` in the same
+transaction; :func:`rebuild` recomputes the table from scratch.
+
+Rebuild from the command line (run from ``backend/``)::
+
+    python -m app.services.daily_stats rebuild
+"""
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import DailyStat, TaskLog, TaskStatus
+
+
+async def bump(session: AsyncSession, owner_id: int, day: str, delta: int) -> None:
+    if not delta:
+        return
+    stmt = sqlite_insert(DailyStat).values(owner_id=owner_id, date=day, completed=max(delta, 0))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStat.owner_id, DailyStat.date],
+        set_={"completed": func.max(DailyStat.completed + delta, 0)},
+    )
+    await session.execute(stmt)
+
+
+async def completed_on(session: AsyncSession, owner_id: int, day: str) -> int:
+    result = await session.execute(
+        select(DailyStat.completed).where(DailyStat.owner_id == owner_id, DailyStat.date == day)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def completed_windows(
+    session: AsyncSession, owner_id: int, today: date, windows: tuple[int, ...]
+) -> dict[int, int]:
+    """Sums completions for each trailing window of ``days`` in one range scan."""
+    starts = {days: (today - timedelta(days=days)).isoformat() for days in windows}
+    columns = [
+        func.coalesce(func.sum(case((DailyStat.date >= start, DailyStat.completed), else_=0)), 0)
+        for start in starts.values()
+    ]
+    result = await session.execute(
+        select(*columns).where(DailyStat.owner_id == owner_id, DailyStat.date >= min(starts.values()))
+    )
+    return dict(zip(starts, result.one()))
+
+
+async def discount_task(session: AsyncSession, owner_id: int, task_id: int) -> None:
+    """Removes a task's DONE logs from the rollup before the task is deleted."""
+    result = await session.execute(
+        select(TaskLog.date, func.count(TaskLog.id))
+        .where(TaskLog.task_id == task_id, TaskLog.status == TaskStatus.DONE)
+        .group_by(TaskLog.date)
+    )
+    for day, count in result.all():
+        await bump(session, owner_id, day, -count)
+
+
+async def rebuild(session: AsyncSession) -> int:
+    """Recomputes every row from ``task_logs``; returns the number of owner-days."""
+    await session.execute(delete(DailyStat))
+    await session.execute(
+        insert(DailyStat).from_select(
+            ["owner_id", "date", "completed"],
+            select(TaskLog.owner_id, TaskLog.date, func.count(TaskLog.id))
+            .where(TaskLog.status == TaskStatus.DONE)
+            .group_by(TaskLog.owner_id, TaskLog.date),
+        )
+    )
+    return (await session.execute(select(func.count()).select_from(DailyStat))).scalar_one()
+
+
+async def _main(argv: list[str]) -> int:
+    if argv != ["rebuild"]:
+        print("usage: python -m app.services.daily_stats rebuild")
+        return 2
+
+    from app.db import SessionLocal, engine, init_db
+
+    await init_db()
+    async with SessionLocal() as session:
+        days = await rebuild(session)
+        await session.commit()
+    await engine.dispose()
+    print(f"daily_stats rebuilt: {days} owner-days")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
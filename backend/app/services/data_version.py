@@ -0,0 +1,82 @@
+"""Per-resource data versions for weak ETags on read-heavy GET endpoints.
+
+Write handlers call :meth:`DataVersion.bump` after committing; GET handlers
+declare :func:`conditional` so a matching ``If-None-Match`` is answered with
+304 before any query runs. Versions live in process memory and start from a
+random boot id, so tags never collide across restarts. They are not shared
+between processes: run a single worker or set ``ETAG_ENABLED=false``.
+
+Per-user resources (tasks, niches, stats, profile) are versioned per owner,
+so one user's writes never invalidate another user's tags.
+"""
+import uuid
+from collections.abc import Callable
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from app.auth import current_owner
+from app.config import settings
+
+
+class DataVersion:
+    def __init__(self) -> None:
+        self._boot = uuid.uuid4().hex[:8]
+        self._epoch = 0
+        self._versions: dict[tuple[str, int | None], int] = {}
+
+    def bump(self, *resources: str, owner: int | None = None) -> None:
+        for resource in resources:
+            key = (resource, owner)
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def bump_all(self) -> None:
+        """Invalidates every tag, including owners that never wrote."""
+        self._epoch += 1
+
+    def etag(self, resources: tuple[str, ...], extra: str = "", owner: int | None = None) -> str:
+        parts = "-".join(str(self._versions.get((resource, owner), 0)) for resource in resources)
+        prefix = f"{self._boot}.{self._epoch}" if owner is None else f"{self._boot}.{self._epoch}.u{owner}"
+        return f'W/"{prefix}-{parts}{"-" + extra if extra else ""}"'
+
+
+data_version = DataVersion()
+
+
+def _matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on both sides
+    bare = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == bare for candidate in header.split(","))
+
+
+def _check(request: Request, response: Response, etag: str) -> None:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def conditional(*resources: str, scope: Callable[[], str] | None = None, per_owner: bool = False):
+    """Route dependency adding an ETag and short-circuiting with 304.
+
+    ``scope`` adds extra state to the tag, e.g. today's date for responses
+    that change at midnight without any write. ``per_owner`` versions the
+    resources per calling user (see :func:`app.auth.current_owner`).
+    """
+
+    if per_owner:
+        async def owner_dependency(
+            request: Request, response: Response, owner_id: int = Depends(current_owner)
+        ) -> None:
+            if settings.etag_enabled:
+                _check(request, response, data_version.etag(resources, scope() if scope else "", owner=owner_id))
+
+        return Depends(owner_dependency)
+
+    async def dependency(request: Request, response: Response) -> None:
+        if settings.etag_enabled:
+            _check(request, response, data_version.etag(resources, scope() if scope else ""))
+
+    return Depends(dependency)
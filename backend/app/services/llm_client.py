@@ -0,0 +1,321 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+
+import httpx
+
+from app.config import settings
+from app.services.ai_telemetry import ai_telemetry
+from app.services.response_cache import build_cache_key, response_cache
+from app.services.single_flight import SingleFlight, build_flight_key
+
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when an upstream AI provider call fails after all retries."""
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class ProviderConfig:
+    name: str
+    base_url: str
+    api_key: str | None
+
+
+def _provider_configs() -> dict[str, ProviderConfig]:
+    return {
+        "xai": ProviderConfig("xai", settings.xai_base_url, settings.xai_api_key),
+        "openai": ProviderConfig("openai", settings.openai_base_url, settings.openai_api_key),
+    }
+
+
+class LLMClient:
+    """App-lifetime HTTP layer for AI providers.
+
+    One pooled ``httpx.AsyncClient`` per provider keeps TCP/TLS connections
+    alive between requests, a semaphore caps concurrent upstream calls and
+    transient failures are retried with jittered exponential backoff.
+    """
+
+    def __init__(self) -> None:
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+        self._flights = SingleFlight()
+        self._ttfb_ms: dict[str, deque[float]] = {}
+        self._stream_counts: dict[str, dict[str, int]] = {}
+
+    async def start(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        """Opens the provider pools; ``transport`` lets tests plug in a mock server."""
+        for name, config in _provider_configs().items():
+            if name in self._clients:
+                continue
+            self._clients[name] = httpx.AsyncClient(
+                base_url=config.base_url,
+                http2=settings.llm_http2,
+                transport=transport,
+                timeout=httpx.Timeout(settings.llm_timeout, connect=settings.llm_connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.llm_max_connections,
+                    max_keepalive_connections=settings.llm_max_keepalive,
+                    keepalive_expiry=settings.llm_keepalive_expiry,
+                ),
+            )
+            self._semaphores[name] = asyncio.Semaphore(settings.llm_max_concurrency)
+            self._stats[name] = {"requests": 0, "retries": 0, "errors": 0, "in_flight": 0}
+            self._ttfb_ms[name] = deque(maxlen=256)
+            self._stream_counts[name] = {"started": 0, "completed": 0, "cancelled": 0}
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def _client(self, provider: str) -> httpx.AsyncClient:
+        client = self._clients.get(provider)
+        if client is None:
+            raise LLMError(f"LLM client for '{provider}' is not started")
+        return client
+
+    async def request(
+        self,
+        provider: str,
+        method: str,
+        path: str,
+        *,
+        json: dict | None = None,
+        timeout: float | None = None,
+    ) -> httpx.Response:
+        """Sends a request to ``provider`` and returns the final response.
+
+        Retryable statuses and transport errors are retried; any other
+        response is returned as-is so callers keep their own status handling.
+        """
+        client = self._client(provider)
+        config = _provider_configs()[provider]
+        headers = {"Authorization": f"Bearer {config.api_key}"}
+        stats = self._stats[provider]
+        kwargs = {"json": json, "headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        attempt = 0
+        async with self._semaphores[provider]:
+            stats["in_flight"] += 1
+            try:
+                while True:
+                    stats["requests"] += 1
+                    try:
+                        response = await client.request(method, path, **kwargs)
+                    except httpx.TransportError as exc:
+                        if attempt >= settings.llm_max_retries:
+                            stats["errors"] += 1
+                            raise LLMError(f"{provider} network error: {exc}") from exc
+                        delay = self._backoff(attempt)
+                    else:
+                        if response.status_code not in RETRYABLE_STATUS or attempt >= settings.llm_max_retries:
+                            if response.status_code >= 400:
+                                stats["errors"] += 1
+                            return response
+                        delay = self._retry_after(response) or self._backoff(attempt)
+                        await response.aclose()
+                    attempt += 1
+                    stats["retries"] += 1
+                    logger.warning("Retrying %s %s (attempt %s) in %.2fs", provider, path, attempt, delay)
+                    await asyncio.sleep(delay)
+            finally:
+                stats["in_flight"] -= 1
+
+    async def chat(
+        self,
+        provider: str,
+        payload: dict,
+        *,
+        endpoint: str | None = None,
+        timeout: float | None = None,
+        validate: Callable[[str], object] | None = None,
+    ) -> str:
+        """Runs a chat completion and returns the first choice's content.
+
+        ``endpoint`` names the calling route; endpoints with a configured
+        cache TTL are answered from the response cache when possible.
+        Concurrent identical calls are coalesced into one upstream request.
+        ``validate`` runs on a fresh reply before it is cached; if it raises,
+        the reply is not cached and the exception propagates to the caller.
+        Without a TTL for ``endpoint`` nothing is cached, so it only moves
+        the parse error into the call.
+        """
+        ttl = response_cache.ttl_for(endpoint)
+        if ttl is not None:
+            started = time.perf_counter()
+            key = build_cache_key(provider, payload)
+            cached = await response_cache.get(endpoint, key)
+            if cached is not None:
+                ai_telemetry.record(
+                    provider,
+                    payload.get("model"),
+                    endpoint,
+                    latency_ms=(time.perf_counter() - started) * 1000,
+                    status="cached",
+                )
+                return cached
+
+        async def fetch() -> str:
+            content = await self._chat_upstream(provider, payload, timeout, endpoint)
+            if validate is not None:
+                validate(content)
+            if ttl is not None:
+                await response_cache.set(key, content, ttl)
+            return content
+
+        if not settings.llm_single_flight:
+            return await fetch()
+        return await self._flights.do(build_flight_key(provider, payload), fetch)
+
+    async def _chat_upstream(self, provider: str, payload: dict, timeout: float | None, endpoint: str | None) -> str:
+        started = time.perf_counter()
+        usage: dict = {}
+        status = "error"
+        try:
+            response = await self.request(provider, "POST", "/chat/completions", json=payload, timeout=timeout)
+            if response.status_code != 200:
+                status = f"error:{response.status_code}"
+                raise LLMError(f"{provider} returned {response.status_code}", status_code=response.status_code)
+            try:
+                body = response.json()
+                content = body["choices"][0]["message"]["content"]
+            except (ValueError, KeyError, IndexError) as exc:
+                raise LLMError(f"{provider} returned a malformed completion") from exc
+            usage = body.get("usage") or {}
+            status = "ok"
+            return content
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            ai_telemetry.record(
+                provider,
+                payload.get("model"),
+                endpoint,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                status=status,
+                prompt_tokens=usage.get("prompt_tokens") or 0,
+                completion_tokens=usage.get("completion_tokens") or 0,
+            )
+
+    async def stream_chat(
+        self, provider: str, payload: dict, *, endpoint: str | None = None, timeout: float | None = None
+    ) -> AsyncIterator[str]:
+        """Streams a chat completion, yielding content deltas as they arrive.
+
+        Closing the generator (e.g. when the client disconnects) closes the
+        upstream connection, so abandoned generations stop being billed.
+        Streams are not retried once started.
+        """
+        client = self._client(provider)
+        config = _provider_configs()[provider]
+        headers = {"Authorization": f"Bearer {config.api_key}"}
+        counts = self._stream_counts[provider]
+        # Without include_usage OpenAI-compatible APIs leave token counts out of
+        # streams; with it they send them in a final chunk with no choices.
+        body = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+        kwargs = {"json": body, "headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        async with self._semaphores[provider]:
+            counts["started"] += 1
+            started = time.perf_counter()
+            first_token = True
+            completed = False
+            status = "cancelled"
+            usage: dict = {}
+            try:
+                async with client.stream("POST", "/chat/completions", **kwargs) as response:
+                    if response.status_code != 200:
+                        status = f"error:{response.status_code}"
+                        raise LLMError(f"{provider} returned {response.status_code}", status_code=response.status_code)
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            chunk = json.loads(data)
+                            usage = chunk.get("usage") or usage
+                            if not chunk.get("choices"):
+                                continue
+                            delta = chunk["choices"][0]["delta"].get("content")
+                        except (ValueError, KeyError, IndexError, AttributeError):
+                            continue
+                        if not delta:
+                            continue
+                        if first_token:
+                            first_token = False
+                            self._ttfb_ms[provider].append((time.perf_counter() - started) * 1000)
+                        yield delta
+                completed = True
+                status = "ok"
+            except httpx.HTTPError as exc:
+                status = "error"
+                raise LLMError(f"{provider} stream failed: {exc}") from exc
+            finally:
+                counts["completed" if completed else "cancelled"] += 1
+                ai_telemetry.record(
+                    provider,
+                    payload.get("model"),
+                    endpoint,
+                    latency_ms=(time.perf_counter() - started) * 1000,
+                    status=status,
+                    prompt_tokens=usage.get("prompt_tokens") or 0,
+                    completion_tokens=usage.get("completion_tokens") or 0,
+                )
+
+    def stream_stats(self) -> dict[str, dict[str, float]]:
+        result = {}
+        for name, counts in self._stream_counts.items():
+            samples = sorted(self._ttfb_ms[name])
+            result[name] = {
+                **counts,
+                "ttfb_ms_p50": round(samples[len(samples) // 2], 1) if samples else 0.0,
+                "ttfb_ms_p95": round(samples[int(len(samples) * 0.95)], 1) if samples else 0.0,
+            }
+        return result
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {name: dict(values) for name, values in self._stats.items()}
+
+    def flight_stats(self) -> dict[str, int]:
+        return self._flights.stats()
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        base = settings.llm_backoff_base * (2**attempt)
+        return min(base, settings.llm_backoff_max) * (0.5 + random.random() / 2)
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> float | None:
+        value = response.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return min(float(value), settings.llm_backoff_max)
+        except ValueError:
+            return None
+
+
+llm_client = LLMClient()
@@ -0,0 +1,131 @@
+"""Precomputed calendar of upcoming posting-window occurrences.
+
+Active ``PostingWindow`` rows are loaded once (``reload``, called at startup
+and after every window change) and expanded into zone-aware occurrences for
+``posting_calendar_days`` ahead. The expansion is redone only when the
+windows, the posting timezone or the local date change, so
+``/scheduler/windows`` is a bisect plus a slice over the cached list.
+"""
+import bisect
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.db import SessionLocal
+from app.models import AccountPlatform, PostingWindow
+
+
+@dataclass(frozen=True)
+class WindowDef:
+    id: int
+    label: str
+    platform: str | None
+    start: time
+    end: time
+    weekdays: frozenset[int]
+    alert_minutes: int
+
+    @property
+    def duration(self) -> timedelta:
+        start = datetime.combine(date.min, self.start)
+        end = datetime.combine(date.min, self.end)
+        return end - start if end > start else end + timedelta(days=1) - start
+
+
+def _parse_time(value: str) -> time:
+    hour, minute = (int(part) for part in value.split(":", 1))
+    return time(hour, minute)
+
+
+def _parse_days(value: str | None) -> frozenset[int]:
+    days = frozenset(int(d) for d in value.split(",") if d.strip()) if value else frozenset()
+    return days or frozenset(range(1, 8))
+
+
+class PostingCalendar:
+    def __init__(self) -> None:
+        self.windows: dict[int, WindowDef] = {}
+        self._key: tuple | None = None
+        self._starts: list[datetime] = []
+        self._slots: list[dict] = []
+        self._max_duration = timedelta()
+        self.rebuilds = 0
+
+    async def reload(self) -> None:
+        async with SessionLocal() as session:
+            result = await session.execute(
+                select(PostingWindow, AccountPlatform.platform)
+                .outerjoin(AccountPlatform, PostingWindow.platform_id == AccountPlatform.id)
+                .where(PostingWindow.is_active == True)  # noqa: E712
+            )
+            self.windows = {
+                window.id: WindowDef(
+                    window.id,
+                    window.label,
+                    platform,
+                    _parse_time(window.start_time),
+                    _parse_time(window.end_time),
+                    _parse_days(window.week_days),
+                    window.alert_minutes or 0,
+                )
+                for window, platform in result.all()
+            }
+        self._key = None
+
+    def _ensure(self, now: datetime) -> None:
+        tz = ZoneInfo(settings.posting_timezone)
+        today = now.astimezone(tz).date()
+        key = (settings.posting_timezone, today, settings.posting_calendar_days)
+        if key == self._key:
+            return
+
+        slots = []
+        # Start a day early so windows that run past midnight are still listed.
+        for offset in range(-1, settings.posting_calendar_days + 1):
+            day = today + timedelta(days=offset)
+            for window in self.windows.values():
+                if day.isoweekday() not in window.weekdays:
+                    continue
+                start_dt = datetime.combine(day, window.start, tzinfo=tz)
+                end_dt = start_dt + window.duration
+                slots.append(
+                    {
+                        "window_id": window.id,
+                        "label": window.label,
+                        "platform": window.platform,
+                        "start": start_dt.isoformat(),
+                        "end": end_dt.isoformat(),
+                        "alert_at": (start_dt - timedelta(minutes=window.alert_minutes)).isoformat(),
+                        "_start": start_dt,
+                        "_end": end_dt,
+                    }
+                )
+        slots.sort(key=lambda slot: (slot["_start"], slot["window_id"]))
+        self._slots = slots
+        self._starts = [slot["_start"] for slot in slots]
+        self._max_duration = max((w.duration for w in self.windows.values()), default=timedelta())
+        self._key = key
+        self.rebuilds += 1
+
+    def upcoming(self, now: datetime | None = None, days: int = 1, limit: int = 50) -> list[dict]:
+        """Occurrences still running at ``now`` or starting within ``days``."""
+        now = now or datetime.now(ZoneInfo(settings.posting_timezone))
+        self._ensure(now)
+        horizon = now + timedelta(days=days)
+        index = bisect.bisect_left(self._starts, now - self._max_duration)
+        result = []
+        for slot in self._slots[index:]:
+            if slot["_start"] >= horizon or len(result) >= limit:
+                break
+            if slot["_end"] > now:
+                result.append({k: v for k, v in slot.items() if not k.startswith("_")})
+        return result
+
+    def stats(self) -> dict:
+        return {"windows": len(self.windows), "slots": len(self._slots), "rebuilds": self.rebuilds}
+
+
+posting_calendar = PostingCalendar()
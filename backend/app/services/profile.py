@@ -0,0 +1,258 @@
+"""Per-owner profile access with write-through caches and atomic XP updates.
+
+Every user is a ``UserProfile`` row; its id is the ``owner_id`` on their
+tasks, niches and logs. Two bounded LRU caches keep the hot paths off the
+database: profile snapshots by owner id, and Telegram chat id to owner id
+(the identity lookup behind initData auth and the bot).
+
+Every write goes through an ``UPDATE ... RETURNING`` statement so
+concurrent requests never read-modify-write XP, level or streak in Python.
+The returned snapshot is staged on the session and only cached once that
+session commits; if another write for the same owner was issued in the
+meantime the entry is dropped instead, so a slower commit can never
+overwrite a newer snapshot. The caches are process-local, like the ETag
+versions in ``data_version``.
+"""
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, event, insert, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db import seed_niches
+from app.models import UserProfile
+from app.schemas import UserProfileRead
+
+
+logger = logging.getLogger(__name__)
+
+XP_PER_LEVEL = 100
+
+PROFILE_COLUMNS = (
+    UserProfile.id,
+    UserProfile.level,
+    UserProfile.xp,
+    UserProfile.streak,
+    UserProfile.last_activity_date,
+    UserProfile.inventory,
+    UserProfile.achievements,
+    UserProfile.telegram_chat_id,
+)
+NEW_PROFILE = {"level": 1, "xp": 0, "streak": 0, "inventory": "[]", "achievements": "[]"}
+
+
+def _snapshot(row) -> tuple[int, UserProfileRead]:
+    values = dict(row._mapping)
+    return values.pop("id"), UserProfileRead.model_validate(values)
+
+
+class _LRU(OrderedDict):
+    def __init__(self, max_size: int) -> None:
+        super().__init__()
+        self.max_size = max_size
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def put(self, key, value) -> None:
+        self[key] = value
+        self.move_to_end(key)
+        if len(self) > self.max_size:
+            self.popitem(last=False)
+
+
+class ProfileService:
+    def __init__(self, max_cached: int) -> None:
+        self._default_id: int | None = None
+        self._cached: _LRU = _LRU(max_cached)  # owner id -> UserProfileRead
+        self._chat_ids: _LRU = _LRU(max_cached)  # Telegram chat id -> owner id
+        self._issued = 0
+        self._latest: dict[int, int] = {}  # owner id -> generation of its newest uncommitted write
+
+    def invalidate(self) -> None:
+        self._default_id = None
+        self._cached.clear()
+        self._chat_ids.clear()
+
+    async def default_id(self, session: AsyncSession) -> int:
+        """The first profile, created on first use.
+
+        It owns data written without Telegram identity: local development,
+        single-user deployments and rows that predate multi-user support.
+        When it has no chat yet it is linked to ``ADMIN_CHAT_ID``, so the
+        operator sees that data when they open the Mini App.
+        """
+        if self._default_id is None:
+            row = (
+                await session.execute(
+                    select(UserProfile.id, UserProfile.telegram_chat_id).order_by(UserProfile.id).limit(1)
+                )
+            ).first()
+            if row is None:
+                profile_id = (
+                    await session.execute(insert(UserProfile).values(**NEW_PROFILE).returning(UserProfile.id))
+                ).scalar_one()
+                await seed_niches(session, profile_id)
+                await session.commit()
+                chat_id = None
+            else:
+                profile_id, chat_id = row
+            if chat_id is None and settings.admin_chat_id:
+                await self._link_admin_chat(session, profile_id)
+            self._default_id = profile_id
+        return self._default_id
+
+    async def _link_admin_chat(self, session: AsyncSession, profile_id: int) -> None:
+        admin_chat = str(settings.admin_chat_id)
+        claimed = (
+            await session.execute(select(UserProfile.id).where(UserProfile.telegram_chat_id == admin_chat))
+        ).scalar()
+        if claimed is not None:
+            logger.warning(
+                "ADMIN_CHAT_ID %s already belongs to profile %s; the default profile %s stays unlinked",
+                admin_chat, claimed, profile_id,
+            )
+            return
+        await session.execute(
+            update(UserProfile)
+            .where(UserProfile.id == profile_id, UserProfile.telegram_chat_id.is_(None))
+            .values(telegram_chat_id=admin_chat)
+        )
+        await session.commit()
+        self._cached.pop(profile_id, None)
+        self._chat_ids.put(admin_chat, profile_id)
+        logger.info("Linked the default profile %s to ADMIN_CHAT_ID %s", profile_id, admin_chat)
+
+    async def id_for_chat(self, session: AsyncSession, chat_id: str) -> int | None:
+        """Resolves a Telegram chat id to a profile id; hits are cached."""
+        profile_id = self._chat_ids.get(chat_id)
+        if profile_id is None:
+            if settings.admin_chat_id and chat_id == str(settings.admin_chat_id):
+                # Links the default profile to the operator if it is not linked yet.
+                await self.default_id(session)
+            result = await session.execute(select(UserProfile.id).where(UserProfile.telegram_chat_id == chat_id))
+            profile_id = result.scalar_one_or_none()
+            if profile_id is not None:
+                self._chat_ids.put(chat_id, profile_id)
+        return profile_id
+
+    async def owner_for_chat(self, session: AsyncSession, chat_id: str) -> int:
+        """Like :meth:`id_for_chat`, but provisions a profile with starter niches for a new user."""
+        profile_id = await self.id_for_chat(session, chat_id)
+        if profile_id is not None:
+            return profile_id
+        # The unique chat index makes concurrent first requests converge on one row.
+        created = await session.execute(
+            sqlite_insert(UserProfile)
+            .values(**NEW_PROFILE, telegram_chat_id=chat_id)
+            .on_conflict_do_nothing(index_elements=[UserProfile.telegram_chat_id])
+            .returning(UserProfile.id)
+        )
+        profile_id = created.scalar()
+        if profile_id is not None:
+            await seed_niches(session, profile_id)
+        await session.commit()
+        return await self.id_for_chat(session, chat_id)
+
+    def _stage(self, session: AsyncSession, row) -> UserProfileRead:
+        self._issued += 1
+        owner_id, profile = _snapshot(row)
+        self._latest[owner_id] = self._issued
+        session.info.setdefault("profile_writes", {})[owner_id] = (self._issued, profile)
+        return profile
+
+    def _committed(self, session: Session) -> None:
+        for owner_id, (generation, profile) in session.info.pop("profile_writes", {}).items():
+            if self._latest.get(owner_id) == generation:
+                del self._latest[owner_id]
+                self._cached.put(owner_id, profile)
+            else:
+                self._cached.pop(owner_id, None)
+
+    def _rolled_back(self, session: Session) -> None:
+        for owner_id, (generation, _) in session.info.pop("profile_writes", {}).items():
+            if self._latest.get(owner_id) == generation:
+                del self._latest[owner_id]
+
+    async def get(self, session: AsyncSession, owner_id: int) -> UserProfileRead:
+        """Returns the owner's cached profile, loading it on a miss."""
+        profile = self._cached.get(owner_id)
+        if profile is None:
+            row = (await session.execute(select(*PROFILE_COLUMNS).where(UserProfile.id == owner_id))).one()
+            profile = _snapshot(row)[1]
+            if owner_id not in self._latest:
+                self._cached.put(owner_id, profile)
+        return profile
+
+    async def update(self, session: AsyncSession, owner_id: int, values: dict) -> UserProfileRead:
+        if not values:
+            return await self.get(session, owner_id)
+        row = (
+            await session.execute(
+                update(UserProfile)
+                .where(UserProfile.id == owner_id)
+                .values(**values)
+                .returning(*PROFILE_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+        ).first()
+        return self._stage(session, row)
+
+    async def award(self, session: AsyncSession, owner_id: int, xp: int, today_str: str) -> UserProfileRead:
+        """Adds ``xp``, advances the streak for ``today_str`` and levels up, atomically."""
+        yesterday = (datetime.strptime(today_str, "%Y-%m-%d").date() - timedelta(days=1)).isoformat()
+
+        row = (
+            await session.execute(
+                update(UserProfile)
+                .where(UserProfile.id == owner_id)
+                .values(
+                    xp=UserProfile.xp + xp,
+                    streak=case(
+                        (UserProfile.last_activity_date == today_str, UserProfile.streak),
+                        (UserProfile.last_activity_date == yesterday, UserProfile.streak + 1),
+                        (
+                            or_(UserProfile.last_activity_date.is_(None), UserProfile.last_activity_date < yesterday),
+                            1,
+                        ),
+                        else_=UserProfile.streak,
+                    ),
+                    last_activity_date=today_str,
+                )
+                .returning(*PROFILE_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+        ).first()
+
+        # Level Logic (100 XP per level); SET expressions see the pre-update row
+        while row.xp >= row.level * XP_PER_LEVEL:
+            row = (
+                await session.execute(
+                    update(UserProfile)
+                    .where(UserProfile.id == owner_id, UserProfile.xp >= UserProfile.level * XP_PER_LEVEL)
+                    .values(xp=UserProfile.xp - UserProfile.level * XP_PER_LEVEL, level=UserProfile.level + 1)
+                    .returning(*PROFILE_COLUMNS)
+                    .execution_options(synchronize_session=False)
+                )
+            ).one()
+        return self._stage(session, row)
+
+
+profile_service = ProfileService(max_cached=settings.profile_cache_size)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    profile_service._committed(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    profile_service._rolled_back(session)
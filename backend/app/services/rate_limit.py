@@ -0,0 +1,62 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Reservation-based token bucket: callers take a token and sleep off any debt.
+
+    Tokens may go negative, so concurrent callers queue up in arrival order
+    instead of all waking at once and retrying.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Takes ``tokens`` and returns how many seconds to wait before using them."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= tokens
+        return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def penalize(self, seconds: float) -> None:
+        """Pushes the bucket into debt, e.g. after a server-side ``retry_after``."""
+        self.reserve(seconds * self.rate)
+
+
+class KeyedRateLimiter:
+    """A global bucket plus one bucket per key (e.g. per Telegram chat).
+
+    Per-key buckets are kept in a bounded LRU so idle keys do not accumulate.
+    """
+
+    def __init__(self, global_rate: float, per_key_rate: float, max_keys: int = 10_000) -> None:
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_key_rate = per_key_rate
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.per_key_rate)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    async def acquire(self, key: str) -> None:
+        # Wait for the key first so a slow chat does not hold global capacity.
+        await self.bucket(key).acquire()
+        await self.global_bucket.acquire()
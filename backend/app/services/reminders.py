@@ -0,0 +1,102 @@
+"""Per-task reminders for recurring tasks with a ``scheduled_time``.
+
+The reminder index is the scheduler engine's heap: every recurring,
+non-archived task with a time gets one job keyed ``task:{id}``. It is built
+with a single query at startup and then kept current by the task routes
+(``sync`` after create/update, ``remove`` after delete), so nothing rescans
+the table.
+
+Due reminders go to the task owner's chat through the Telegram outbox in
+app.bot, keyed by the occurrence so a re-fired job never sends twice. The
+outbox folds reminders for the same chat that fall due together into one
+message and applies Telegram's rate limits.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.bot import outbox, owner_chat_id
+from app.config import settings
+from app.db import SessionLocal
+from app.models import Task, TaskType
+from app.services.scheduler_engine import DailyRule, scheduler_engine
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderService:
+    def __init__(self) -> None:
+        self._jobs: dict[str, tuple[int, str]] = {}  # job id -> (owner id, title)
+        self.due = 0
+
+    async def reload(self) -> None:
+        """Rebuilds the index from the task table (startup and system reset)."""
+        for job_id in list(self._jobs):
+            scheduler_engine.cancel(job_id)
+        self._jobs.clear()
+        async with SessionLocal() as session:
+            result = await session.execute(
+                select(Task.id, Task.owner_id, Task.title, Task.task_type, Task.scheduled_time, Task.week_days, Task.is_archived)
+                .where(
+                    Task.is_archived == False,  # noqa: E712
+                    Task.task_type == TaskType.RECURRING,
+                    Task.scheduled_time.is_not(None),
+                )
+            )
+            for row in result.all():
+                self.sync(*row)
+
+    def sync(
+        self,
+        task_id: int,
+        owner_id: int,
+        title: str,
+        task_type: str,
+        scheduled_time: str | None,
+        week_days: str | None,
+        is_archived: bool,
+    ) -> None:
+        """Adds, reschedules or drops the reminder for one task."""
+        job_id = f"task:{task_id}"
+        if is_archived or task_type != TaskType.RECURRING or not scheduled_time:
+            self.remove(task_id)
+            return
+        try:
+            rule = DailyRule.parse(scheduled_time, settings.timezone, week_days)
+        except ValueError:
+            logger.warning("Task %s has an invalid schedule %r/%r", task_id, scheduled_time, week_days)
+            self.remove(task_id)
+            return
+        self._jobs[job_id] = (owner_id, title)
+        scheduler_engine.schedule(job_id, rule, self._due)
+
+    def sync_task(self, task: Task) -> None:
+        self.sync(
+            task.id, task.owner_id, task.title, task.task_type, task.scheduled_time, task.week_days, task.is_archived
+        )
+
+    def remove(self, task_id: int) -> None:
+        job_id = f"task:{task_id}"
+        if self._jobs.pop(job_id, None) is not None:
+            scheduler_engine.cancel(job_id)
+
+    async def _due(self, job_id: str, occurrence: datetime) -> bool:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return True
+        owner_id, title = job
+        chat_id = await owner_chat_id(owner_id)
+        if not chat_id:
+            return False
+        self.due += 1
+        return await outbox.enqueue(
+            chat_id, f"⏰ Reminder: {title}", dedupe_key=f"{job_id}@{occurrence.isoformat()}"
+        )
+
+    def stats(self) -> dict:
+        return {"indexed": len(self._jobs), "due": self.due}
+
+
+reminders = ReminderService()
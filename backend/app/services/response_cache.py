@@ -0,0 +1,159 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Protocol
+
+import aiosqlite
+
+from app.config import settings
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> str | None: ...
+
+    async def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    async def clear(self) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class MemoryLRUBackend:
+    """Bounded in-process LRU; expired entries are dropped lazily on read."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def get(self, key: str) -> str | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def clear(self) -> None:
+        self._data.clear()
+
+    async def close(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """Persistent cache that survives restarts; uses wall-clock expiry."""
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._conn: aiosqlite.Connection | None = None
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = await aiosqlite.connect(self.path)
+            await self._conn.execute("PRAGMA journal_mode=WAL")
+            await self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            await self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_response_cache_expires_at ON response_cache (expires_at)"
+            )
+            await self._conn.commit()
+        return self._conn
+
+    async def get(self, key: str) -> str | None:
+        conn = await self._connection()
+        async with conn.execute(
+            "SELECT value FROM response_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ) as cursor:
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        conn = await self._connection()
+        now = time.time()
+        await conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, now + ttl),
+        )
+        await conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        await conn.execute(
+            "DELETE FROM response_cache WHERE key IN ("
+            "SELECT key FROM response_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        await conn.commit()
+
+    async def clear(self) -> None:
+        conn = await self._connection()
+        await conn.execute("DELETE FROM response_cache")
+        await conn.commit()
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+
+def build_cache_key(provider: str, payload: dict) -> str:
+    """Hashes model, messages and sampling parameters into a stable key."""
+    canonical = json.dumps({"provider": provider, **payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Caches AI completions per endpoint; endpoints without a TTL are never cached."""
+
+    def __init__(self) -> None:
+        self.backend: CacheBackend | None = None
+        self._counters: dict[str, dict[str, int]] = {}
+
+    async def start(self) -> None:
+        if self.backend is not None:
+            return
+        if settings.llm_cache_backend == "sqlite":
+            self.backend = SQLiteBackend(settings.llm_cache_sqlite_path, settings.llm_cache_max_entries)
+        else:
+            self.backend = MemoryLRUBackend(settings.llm_cache_max_entries)
+
+    async def aclose(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+            self.backend = None
+
+    def ttl_for(self, endpoint: str | None) -> float | None:
+        if self.backend is None or endpoint is None:
+            return None
+        ttl = settings.llm_cache_ttls.get(endpoint)
+        return ttl if ttl and ttl > 0 else None
+
+    async def get(self, endpoint: str, key: str) -> str | None:
+        value = await self.backend.get(key)
+        counters = self._counters.setdefault(endpoint, {"hits": 0, "misses": 0})
+        counters["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self.backend.set(key, value, ttl)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {endpoint: dict(values) for endpoint, values in self._counters.items()}
+
+
+response_cache = ResponseCache()
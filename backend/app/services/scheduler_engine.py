@@ -0,0 +1,258 @@
+"""Heap-based job scheduler with persisted fire records.
+
+Each job is a recurrence rule plus an async callback. The engine keeps one
+heap entry per job (its next occurrence) and sleeps until the earliest one
+is due, so there is no polling and the cost per fire is O(log n) however
+many jobs exist. Every successful fire is recorded in ``scheduler_fired``
+under ``{job_id}@{occurrence}``. After a restart, occurrences within
+``catchup`` that are not recorded are still delivered, and recorded ones
+are never sent twice. A database error is logged and retried with backoff.
+The due batch goes back on the heap, and occurrences that were already
+delivered are kept in memory until their record is written.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.db import SessionLocal
+from app.models import SchedulerFired
+
+
+logger = logging.getLogger(__name__)
+
+# Cap a single sleep so wall-clock jumps (suspend, NTP) are noticed.
+MAX_SLEEP = 300.0
+MAX_ERROR_BACKOFF = 60.0
+
+
+@dataclass(frozen=True)
+class DailyRule:
+    """Fires at ``at`` local time in ``tz`` on the given ISO weekdays (1=Mon)."""
+
+    at: time
+    tz: str
+    weekdays: frozenset[int] = frozenset(range(1, 8))
+    offset: timedelta = timedelta()
+
+    @classmethod
+    def parse(cls, hhmm: str, tz: str, week_days: str | None = None, offset: timedelta = timedelta()) -> "DailyRule":
+        hour, minute = (int(part) for part in hhmm.split(":", 1))
+        days = frozenset(int(d) for d in week_days.split(",") if d.strip()) if week_days else frozenset(range(1, 8))
+        return cls(time(hour, minute), tz, days or frozenset(range(1, 8)), offset)
+
+    def next_after(self, after: datetime) -> datetime | None:
+        zone = ZoneInfo(self.tz)
+        local = after.astimezone(zone)
+        for day in range(8):
+            candidate_date = local.date() + timedelta(days=day)
+            if candidate_date.isoweekday() not in self.weekdays:
+                continue
+            candidate = datetime.combine(candidate_date, self.at, tzinfo=zone) + self.offset
+            if candidate > after:
+                return candidate.astimezone(timezone.utc)
+        return None
+
+
+@dataclass(order=True)
+class _Entry:
+    when: datetime
+    seq: int
+    job_id: str = field(compare=False)
+    generation: int = field(compare=False)
+
+
+@dataclass
+class _Job:
+    rule: DailyRule
+    callback: Callable[[str, datetime], Awaitable[bool]]
+    generation: int
+
+
+class SchedulerEngine:
+    def __init__(self, catchup: timedelta = timedelta(minutes=10)) -> None:
+        self.catchup = catchup
+        self._jobs: dict[str, _Job] = {}
+        self._heap: list[_Entry] = []
+        self._seq = itertools.count()
+        self._generations = itertools.count(1)
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        # Delivered occurrences whose fire record could not be written yet.
+        self._unrecorded: set[str] = set()
+        self.fired = 0
+        self.errors = 0
+
+    def schedule(
+        self,
+        job_id: str,
+        rule: DailyRule,
+        callback: Callable[[str, datetime], Awaitable[bool]],
+        *,
+        now: datetime | None = None,
+    ) -> None:
+        """Adds or replaces a job. ``callback(job_id, occurrence)`` returns True once delivered."""
+        job = _Job(rule, callback, next(self._generations))
+        self._jobs[job_id] = job
+        start = (now or datetime.now(timezone.utc)) - self.catchup
+        self._push(job_id, job, start)
+
+    def cancel(self, job_id: str) -> None:
+        # Heap entries are discarded lazily when their generation no longer matches.
+        if self._jobs.pop(job_id, None) is not None:
+            self._compact()
+            self._wake.set()
+
+    def _push(self, job_id: str, job: _Job, after: datetime) -> None:
+        when = job.rule.next_after(after)
+        if when is None:
+            return
+        heapq.heappush(self._heap, _Entry(when, next(self._seq), job_id, job.generation))
+        if self._heap[0].job_id == job_id:
+            self._wake.set()
+        self._compact()
+
+    def _compact(self) -> None:
+        # Stale entries from cancelled/replaced jobs are dropped when they
+        # surface; rebuild early once they dominate so memory stays bounded.
+        if len(self._heap) > 2 * len(self._jobs) + 64:
+            self._heap = [e for e in self._heap if self._is_live(e)]
+            heapq.heapify(self._heap)
+
+    def _is_live(self, entry: _Entry) -> bool:
+        job = self._jobs.get(entry.job_id)
+        return job is not None and job.generation == entry.generation
+
+    def start(self) -> None:
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def next_due(self) -> datetime | None:
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0].when if self._heap else None
+
+    async def _run(self) -> None:
+        try:
+            await self._prune()
+        except Exception:
+            logger.exception("Pruning scheduler fire records failed")
+        failures = 0
+        while True:
+            try:
+                await self._step()
+                failures = 0
+            except Exception:
+                # A failed lookup or insert must not end the scheduler.
+                failures += 1
+                self.errors += 1
+                delay = min(2 ** failures, MAX_ERROR_BACKOFF)
+                logger.exception("Scheduler iteration failed; retrying in %.0fs", delay)
+                await asyncio.sleep(delay)
+
+    async def _step(self) -> None:
+        """Fires everything due, or waits until the next occurrence."""
+        self._wake.clear()
+        due = self.next_due()
+        now = datetime.now(timezone.utc)
+        if due is None or due > now:
+            timeout = MAX_SLEEP if due is None else min((due - now).total_seconds(), MAX_SLEEP)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        # Everything already due fires as one batch: one lookup and one
+        # insert for the fire records, callbacks run concurrently.
+        batch: list[tuple[_Entry, _Job]] = []
+        while self._heap and self._heap[0].when <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                batch.append((entry, self._jobs[entry.job_id]))
+        try:
+            await self._fire(batch)
+        except Exception:
+            # Put the occurrences back so they are retried; delivered ones are
+            # remembered in _unrecorded and not sent again.
+            for entry, _ in batch:
+                heapq.heappush(self._heap, entry)
+            raise
+        for entry, job in batch:
+            if self._is_live(entry):
+                self._push(entry.job_id, job, entry.when)
+
+    async def _fire(self, batch: list[tuple[_Entry, _Job]]) -> None:
+        if self._unrecorded:
+            await self._record(self._unrecorded)
+        keys = {f"{entry.job_id}@{entry.when.isoformat()}": (entry, job) for entry, job in batch}
+        async with SessionLocal() as session:
+            result = await session.execute(select(SchedulerFired.key).where(SchedulerFired.key.in_(keys)))
+            for (key,) in result.all():
+                del keys[key]
+        if not keys:
+            return
+
+        async def run(key: str, entry: _Entry, job: _Job) -> str | None:
+            try:
+                return key if await job.callback(entry.job_id, entry.when) else None
+            except Exception:
+                logger.exception("Scheduled job %s failed", key)
+                return None
+
+        delivered = [
+            key for key in await asyncio.gather(*(run(key, *pair) for key, pair in keys.items())) if key
+        ]
+        if not delivered:
+            return
+        self._unrecorded.update(delivered)
+        await self._record(self._unrecorded)
+
+    async def _record(self, keys: set[str]) -> None:
+        fired_at = datetime.utcnow()
+        async with SessionLocal() as session:
+            await session.execute(
+                sqlite_insert(SchedulerFired)
+                .values([{"key": key, "fired_at": fired_at} for key in keys])
+                .on_conflict_do_nothing(index_elements=["key"])
+            )
+            await session.commit()
+        self.fired += len(keys)
+        keys.clear()
+
+    async def _prune(self, keep: timedelta = timedelta(days=7)) -> None:
+        async with SessionLocal() as session:
+            await session.execute(delete(SchedulerFired).where(SchedulerFired.fired_at < datetime.utcnow() - keep))
+            await session.commit()
+
+    def stats(self) -> dict:
+        due = self.next_due()
+        return {
+            "jobs": len(self._jobs),
+            "heap": len(self._heap),
+            "fired": self.fired,
+            "errors": self.errors,
+            "unrecorded": len(self._unrecorded),
+            "next_due": due.isoformat() if due else None,
+            "running": self._task is not None,
+        }
+
+
+scheduler_engine = SchedulerEngine()
@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+
+T = TypeVar("T")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def build_flight_key(provider: str, payload: dict) -> str:
+    """Keys a chat call on its model and whitespace-normalized messages.
+
+    Remaining sampling parameters are folded in so that calls which only
+    differ in e.g. ``max_tokens`` are not merged.
+    """
+    messages = [
+        {"role": m.get("role"), "content": _normalize(str(m.get("content", "")))}
+        for m in payload.get("messages", [])
+    ]
+    params = {k: v for k, v in payload.items() if k not in ("messages", "stream")}
+    canonical = json.dumps(
+        {"provider": provider, "messages": messages, "params": params}, sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Lets concurrent identical calls share one in-flight upstream request.
+
+    The first caller for a key starts the work as a task; later callers
+    await the same task. The task is only cancelled once every waiter has
+    gone away, so one disconnecting client does not fail the others.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[str, tuple[asyncio.Task, list[int]]] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(fn())
+            flight = (task, [0])
+            self._flights[key] = flight
+            task.add_done_callback(lambda _t, key=key, flight=flight: self._forget(key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        task, waiters = flight
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if waiters[0] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            waiters[0] -= 1
+
+    def _forget(self, key: str, flight: tuple) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> dict[str, int]:
+        return {"in_flight": len(self._flights), "started": self.started, "coalesced": self.coalesced}
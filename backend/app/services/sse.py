@@ -0,0 +1,55 @@
+import json
+import time
+from collections.abc import AsyncIterator, Callable
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.services.llm_client import LLMError
+
+
+def format_event(data: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _relay(
+    request: Request,
+    chunks: AsyncIterator[str],
+    finalize: Callable[[str], dict],
+) -> AsyncIterator[str]:
+    started = time.perf_counter()
+    ttfb_ms = None
+    parts: list[str] = []
+    try:
+        async for delta in chunks:
+            if await request.is_disconnected():
+                return
+            if ttfb_ms is None:
+                ttfb_ms = round((time.perf_counter() - started) * 1000, 1)
+            parts.append(delta)
+            yield format_event({"delta": delta}, "token")
+        result = finalize("".join(parts))
+        result["ttfb_ms"] = ttfb_ms
+        yield format_event(result, "done")
+    except LLMError as exc:
+        yield format_event({"detail": str(exc)}, "error")
+    finally:
+        await chunks.aclose()
+
+
+def sse_response(
+    request: Request,
+    chunks: AsyncIterator[str],
+    finalize: Callable[[str], dict],
+) -> StreamingResponse:
+    """Relays upstream deltas as ``token`` events, then one ``done`` event.
+
+    ``finalize`` turns the full text into the same body the non-streaming
+    endpoint returns, so clients get identical semantics at the end.
+    """
+    return StreamingResponse(
+        _relay(request, chunks, finalize),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
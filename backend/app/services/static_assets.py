@@ -0,0 +1,164 @@
+"""In-process static file layer for the built Mini App (``frontend/dist``).
+
+``load`` walks the dist directory once at startup and builds an index of
+every file with its media type, a content-hash ETag and its compressed
+variants. Variants come from ``.br``/``.gz`` siblings on disk (see the
+``precompress`` command below). Compressible files without a sibling are
+gzipped in memory at load time. Requests are answered from the index
+without touching the filesystem for lookups:
+
+- ``index.html`` is held in memory and revalidated via its ETag.
+- Vite's content-hashed files under ``assets/`` are cached as immutable.
+- Range requests get the identity file through ``FileResponse``.
+
+Files added to dist after startup are only picked up on restart.
+
+Usage: ``python -m app.services.static_assets precompress [DIST]``
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+try:
+    import brotli
+except ImportError:  # optional: .br files are still served if present on disk
+    brotli = None
+
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/wasm",
+    "image/svg+xml",
+    "text/javascript",
+}
+MIN_COMPRESS_SIZE = 1024
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _compressible(media_type: str) -> bool:
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+@dataclass
+class Asset:
+    path: Path
+    media_type: str
+    etag: str
+    cache_control: str
+    stat: os.stat_result
+    body: bytes | None = None  # kept in memory (index.html)
+    variants: dict[str, Path | bytes] = field(default_factory=dict)
+
+
+def _accepted(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    def __init__(self) -> None:
+        self.assets: dict[str, Asset] = {}
+        self.index: Asset | None = None
+
+    def load(self, dist: Path) -> None:
+        assets: dict[str, Asset] = {}
+        index: Asset | None = None
+        if dist.is_dir():
+            for path in sorted(dist.rglob("*")):
+                if not path.is_file() or path.suffix in (".br", ".gz"):
+                    continue
+                rel = path.relative_to(dist).as_posix()
+                data = path.read_bytes()
+                media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                asset = Asset(
+                    path=path,
+                    media_type=media_type,
+                    etag=f'"{hashlib.sha1(data).hexdigest()[:20]}"',
+                    cache_control=IMMUTABLE if rel.startswith("assets/") else REVALIDATE,
+                    stat=path.stat(),
+                )
+                for coding, suffix in ENCODINGS:
+                    sibling = path.with_name(path.name + suffix)
+                    if sibling.is_file():
+                        asset.variants[coding] = sibling
+                if "gzip" not in asset.variants and _compressible(media_type) and len(data) >= MIN_COMPRESS_SIZE:
+                    asset.variants["gzip"] = gzip.compress(data, compresslevel=9, mtime=0)
+                if rel == "index.html":
+                    asset.body = data
+                    index = asset
+                assets[rel] = asset
+        self.assets, self.index = assets, index
+
+    def get(self, path: str) -> Asset | None:
+        return self.assets.get(path.lstrip("/"))
+
+    def response(self, asset: Asset, request: Request) -> Response:
+        headers = {"Cache-Control": asset.cache_control}
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        coding = None
+        if asset.variants and "range" not in request.headers:
+            accepted = _accepted(request.headers.get("accept-encoding", ""))
+            coding = next((c for c, _ in ENCODINGS if c in accepted and c in asset.variants), None)
+        # Each representation gets its own tag so caches never mix encodings.
+        headers["ETag"] = f'{asset.etag[:-1]}-{coding}"' if coding else asset.etag
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and headers["ETag"] in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        if coding:
+            headers["Content-Encoding"] = coding
+            variant = asset.variants[coding]
+            if isinstance(variant, bytes):
+                return Response(variant, media_type=asset.media_type, headers=headers)
+            return FileResponse(variant, media_type=asset.media_type, headers=headers)
+        if asset.body is not None and "range" not in request.headers:
+            return Response(asset.body, media_type=asset.media_type, headers=headers)
+        return FileResponse(asset.path, media_type=asset.media_type, headers=headers, stat_result=asset.stat)
+
+
+static_assets = StaticAssets()
+
+
+def precompress(dist: Path) -> int:
+    """Writes .gz (and .br when the brotli package is installed) next to compressible files."""
+    written = 0
+    for path in dist.rglob("*"):
+        if not path.is_file() or path.suffix in (".br", ".gz"):
+            continue
+        media_type = mimetypes.guess_type(path.name)[0] or ""
+        data = path.read_bytes()
+        if not _compressible(media_type) or len(data) < MIN_COMPRESS_SIZE:
+            continue
+        path.with_name(path.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        written += 1
+        if brotli is not None:
+            path.with_name(path.name + ".br").write_bytes(brotli.compress(data, quality=11))
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "precompress":
+        print("usage: python -m app.services.static_assets precompress [DIST]")
+        sys.exit(1)
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else Path(__file__).resolve().parents[3] / "frontend" / "dist"
+    print(f"precompressed {precompress(target)} files in {target}")
@@ -0,0 +1,101 @@
+"""Task logging engine shared by the single and batch log endpoints.
+
+All entries are applied inside the caller's transaction with set-based
+statements (one INSERT, one UPDATE, one DELETE at most), and XP, level and
+streak are computed once for the whole batch. The caller commits.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Task, TaskLog, TaskStatus
+from app.schemas import UserProfileRead
+from app.services import daily_stats
+from app.services.profile import profile_service
+
+
+XP_PER_TASK = 10
+
+
+class TaskNotFoundError(LookupError):
+    def __init__(self, task_ids: list[int]):
+        super().__init__(f"Tasks not found: {task_ids}")
+        self.task_ids = task_ids
+
+
+@dataclass
+class LogEntry:
+    task_id: int
+    status: str
+    note: str | None = None
+
+
+async def apply_logs(
+    session: AsyncSession, owner_id: int, entries: list[LogEntry], today_str: str
+) -> UserProfileRead:
+    """Applies ``entries`` for ``today_str`` and returns the owner's updated profile.
+
+    Later entries for the same task win. Raises :class:`TaskNotFoundError`
+    before writing anything if any task id is unknown or not the owner's.
+    """
+    latest = {entry.task_id: entry for entry in entries}
+    found = set(
+        (await session.execute(select(Task.id).where(Task.owner_id == owner_id, Task.id.in_(latest)))).scalars()
+    )
+    missing = sorted(set(latest) - found)
+    if missing:
+        raise TaskNotFoundError(missing)
+
+    done = [entry for entry in latest.values() if entry.status == TaskStatus.DONE]
+    undone = [entry.task_id for entry in latest.values() if entry.status != TaskStatus.DONE]
+    newly_done = 0
+
+    if done:
+        # Upsert on (task_id, date): only freshly inserted logs earn XP
+        now = datetime.utcnow()
+        inserted = await session.execute(
+            sqlite_insert(TaskLog)
+            .values([
+                {
+                    "task_id": e.task_id,
+                    "owner_id": owner_id,
+                    "status": e.status,
+                    "note": e.note,
+                    "date": today_str,
+                    "completed_at": now,
+                }
+                for e in done
+            ])
+            .on_conflict_do_nothing(index_elements=["task_id", "date"])
+            .returning(TaskLog.task_id)
+        )
+        inserted_ids = set(inserted.scalars())
+        newly_done = len(inserted_ids)
+
+        # Already logged, just ensure status is done
+        existing = [e.task_id for e in done if e.task_id not in inserted_ids]
+        if existing:
+            changed = await session.execute(
+                update(TaskLog)
+                .where(TaskLog.task_id.in_(existing), TaskLog.date == today_str, TaskLog.status != TaskStatus.DONE)
+                .values(status=TaskStatus.DONE)
+                .returning(TaskLog.id)
+            )
+            await daily_stats.bump(session, owner_id, today_str, len(changed.all()))
+        await daily_stats.bump(session, owner_id, today_str, newly_done)
+
+    if undone:
+        removed = await session.execute(
+            delete(TaskLog)
+            .where(TaskLog.task_id.in_(undone), TaskLog.date == today_str)
+            .returning(TaskLog.status)
+        )
+        removed_done = sum(1 for status in removed.scalars() if status == TaskStatus.DONE)
+        await daily_stats.bump(session, owner_id, today_str, -removed_done)
+
+    if newly_done:
+        return await profile_service.award(session, owner_id, newly_done * XP_PER_TASK, today_str)
+    return await profile_service.get(session, owner_id)
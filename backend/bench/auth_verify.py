@@ -0,0 +1,89 @@
+"""Micro-benchmarks for Telegram initData verification.
+
+Run from ``backend/``::
+
+    python -m bench.auth_verify --iterations 50000
+
+Compares aiogram's ``safe_parse_webapp_init_data`` (what a per-request
+check would cost), an uncached ``InitDataVerifier`` pass, a cache hit, and
+a request through ``TelegramAuthMiddleware`` with a cache hit.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import urlencode
+
+from aiogram.utils.web_app import safe_parse_webapp_init_data
+
+from app import auth
+
+
+TOKEN = "123456789:bench-token"
+
+
+def signed_init_data(user_id: int, auth_date: int) -> str:
+    fields = {
+        "auth_date": str(auth_date),
+        "query_id": "AAHdF6IQAAAAAN0XohDhrOrc",
+        "user": json.dumps({"id": user_id, "first_name": "Bench", "username": "bench", "language_code": "en"}),
+    }
+    check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", TOKEN.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+
+def _measure(name: str, iterations: int, fn) -> dict:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - started
+    return {"case": name, "us_per_op": round(elapsed / iterations * 1e6, 2), "ops_per_s": round(iterations / elapsed)}
+
+
+async def _measure_middleware(iterations: int, init_data: str) -> dict:
+    async def endpoint(scope, receive, send) -> None:
+        pass
+
+    middleware = auth.TelegramAuthMiddleware(endpoint)
+    headers = [(b"x-telegram-init-data", init_data.encode()), (b"content-type", b"application/json")]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await middleware({"type": "http", "headers": headers}, None, None)
+    elapsed = time.perf_counter() - started
+    return {
+        "case": "middleware (cache hit)",
+        "us_per_op": round(elapsed / iterations * 1e6, 2),
+        "ops_per_s": round(iterations / elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+
+    init_data = signed_init_data(42, int(time.time()))
+    verifier = auth.InitDataVerifier(TOKEN, max_age=86400, cache_size=4096, cache_ttl=300)
+    verifier.verify(init_data)  # warm the cache
+    now = time.time()
+
+    results = [
+        _measure(
+            "aiogram safe_parse_webapp_init_data",
+            args.iterations,
+            lambda: safe_parse_webapp_init_data(TOKEN, init_data),
+        ),
+        _measure("verifier (uncached)", args.iterations, lambda: verifier._verify(init_data, now)),
+        _measure("verifier (cache hit)", args.iterations, lambda: verifier.verify(init_data, now)),
+    ]
+    auth.verifier = verifier
+    results.append(asyncio.run(_measure_middleware(args.iterations, init_data)))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Diffs two ``bench.load`` reports and flags regressions.
+
+Run from ``backend/``::
+
+    python -m bench.compare bench/results/base.json bench/results/new.json --threshold 0.10
+
+Prints one row per scenario with the new throughput and p50/p95/p99
+latency, each next to its change from the baseline. Exits with status 1
+when a scenario's p95 grows, or its throughput drops, by more than
+``--threshold`` (a fraction), or when it has errors that the baseline did
+not. Scenarios present in only one report
+are listed but never fail the comparison.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def _change(base: float, new: float) -> float | None:
+    return (new - base) / base if base else None
+
+
+def _format(change: float | None) -> str:
+    return "n/a" if change is None else f"{change:+.1%}"
+
+
+def compare(base: dict, new: dict, threshold: float) -> tuple[list[str], list[str]]:
+    """Returns the report lines and the regressions found."""
+    lines = [
+        f"base {base['meta'].get('commit')}  new {new['meta'].get('commit')}",
+        f"{'scenario':<26}" + "".join(f"{metric:>22}" for metric in METRICS) + f"{'errors':>10}",
+    ]
+    regressions = []
+    for name in sorted(base["results"].keys() | new["results"].keys()):
+        before, after = base["results"].get(name), new["results"].get(name)
+        if before is None or after is None:
+            lines.append(f"{name:<26} only in {'new' if before is None else 'base'}")
+            continue
+        cells = []
+        for metric in METRICS:
+            change = _change(before[metric], after[metric])
+            cells.append(f"{after[metric]:>12} {_format(change):>9}")
+        errors_before, errors_after = sum(before["errors"].values()), sum(after["errors"].values())
+        lines.append(f"{name:<26}" + "".join(cells) + f"{errors_after:>10}")
+
+        rps_change = _change(before["rps"], after["rps"])
+        p95_change = _change(before["p95_ms"], after["p95_ms"])
+        if rps_change is not None and rps_change < -threshold:
+            regressions.append(f"{name}: throughput {_format(rps_change)}")
+        if p95_change is not None and p95_change > threshold:
+            regressions.append(f"{name}: p95 {_format(p95_change)}")
+        if errors_after > errors_before:
+            regressions.append(f"{name}: errors {errors_before} -> {errors_after}")
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    lines, regressions = compare(json.loads(args.base.read_text()), json.loads(args.new.read_text()), args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        print("\n".join(f"  {regression}" for regression in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
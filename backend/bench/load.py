@@ -0,0 +1,313 @@
+"""Drives the ASGI app with concurrent clients and reports per-endpoint latency.
+
+Run from ``backend/``::
+
+    python -m bench.seed --scale medium
+    python -m bench.load --db bench/data/medium.db --concurrency 32 --requests 2000 --out bench/results/base.json
+    python -m bench.compare bench/results/base.json bench/results/new.json
+
+The app runs in-process behind ``httpx.ASGITransport`` on a throwaway copy
+of ``--db``, so ``log_task`` writes never change the seed. Clients sign
+Telegram ``initData`` for the seeded users and go through the real auth
+middleware. xAI/OpenAI and Gemini are replaced by ``bench.mock_llm`` with
+``--llm-latency`` seconds per call. AI payloads differ per request, so the
+response cache does not short-circuit them.
+
+Scenarios run one after another. Each gets ``--warmup`` unrecorded
+requests and then ``--requests`` requests spread over ``--concurrency``
+clients. The report has throughput, error count and p50/p95/p99/max
+latency per scenario, plus metadata (commit, dataset, settings) so two
+runs can be compared with ``bench.compare``.
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from bench.mock_llm import MockGeminiModel, MockLLM
+
+
+@dataclass
+class User:
+    owner_id: int
+    headers: dict
+    task_ids: list[int] = field(default_factory=list)
+
+
+@dataclass
+class Context:
+    users: list[User]
+    image: bytes
+
+    def user(self, n: int) -> User:
+        return self.users[n % len(self.users)]
+
+    def task(self, n: int) -> tuple[User, int]:
+        user = self.user(n)
+        return user, user.task_ids[(n // len(self.users)) % len(user.task_ids)]
+
+
+async def _list_tasks(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.get("/tasks/", params={"limit": 50}, headers=ctx.user(n).headers)
+
+
+async def _list_tasks_all(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.get("/tasks/", headers=ctx.user(n).headers)
+
+
+async def _get_stats(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.get("/tasks/stats", headers=ctx.user(n).headers)
+
+
+async def _list_niches(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.get("/niches/", headers=ctx.user(n).headers)
+
+
+async def _log_task(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    user, task_id = ctx.task(n)
+    # Alternate done/pending per pass over the tasks so both paths are exercised.
+    passes = n // (len(ctx.users) * len(user.task_ids))
+    status = "done" if passes % 2 == 0 else "pending"
+    return await client.post(f"/tasks/{task_id}/log", params={"status": status}, headers=user.headers)
+
+
+async def _breakdown(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.post("/assistant/breakdown", json={"goal": f"Goal {n}"}, headers=ctx.user(n).headers)
+
+
+async def _daily_summary(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.get("/assistant/daily-summary", headers=ctx.user(n).headers)
+
+
+async def _hooks(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.post("/marketing/hooks", json={"model_name": f"Model {n}"}, headers=ctx.user(n).headers)
+
+
+async def _brief(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.post("/planning/brief", json={"brief": f"Brief {n}"}, headers=ctx.user(n).headers)
+
+
+async def _brief_stream(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.post("/planning/brief/stream", json={"brief": f"Brief {n}"}, headers=ctx.user(n).headers)
+
+
+async def _banana(client: httpx.AsyncClient, ctx: Context, n: int) -> httpx.Response:
+    return await client.post(
+        "/banana/magic",
+        data={"mode": "caption"},
+        files={"file": ("photo.jpg", ctx.image, "image/jpeg")},
+        headers=ctx.user(n).headers,
+    )
+
+
+SCENARIOS = {
+    "tasks.list": _list_tasks,
+    "tasks.list_all": _list_tasks_all,
+    "tasks.stats": _get_stats,
+    "niches.list": _list_niches,
+    "tasks.log": _log_task,
+    "assistant.breakdown": _breakdown,
+    "assistant.daily_summary": _daily_summary,
+    "marketing.hooks": _hooks,
+    "planning.brief": _brief,
+    "planning.brief.stream": _brief_stream,
+    "banana.magic": _banana,
+}
+
+
+async def run_scenario(client: httpx.AsyncClient, ctx: Context, request, requests: int, concurrency: int, offset: int = 0) -> dict:
+    from app.services.ai_telemetry import percentile
+
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    numbers = iter(range(offset, offset + requests))
+
+    async def worker() -> None:
+        for n in numbers:
+            started = time.perf_counter()
+            try:
+                response = await request(client, ctx, n)
+                outcome = None if response.status_code < 400 else str(response.status_code)
+            except Exception as exc:
+                outcome = type(exc).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            if outcome:
+                errors[outcome] = errors.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    samples = sorted(latencies)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+        "p99_ms": percentile(samples, 0.99),
+        "max_ms": round(samples[-1], 1) if samples else 0.0,
+    }
+
+
+def _jpeg(width: int = 1200, height: int = 900) -> bytes:
+    from PIL import Image
+
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def _git_commit() -> str | None:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True)
+        return commit + ("-dirty" if dirty.stdout.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _load_users(max_users: int) -> tuple[list[User], dict]:
+    from sqlalchemy import func, select
+
+    from app.db import SessionLocal
+    from app.models import Task, TaskLog, UserProfile
+    from bench.auth_verify import signed_init_data
+
+    now = int(time.time())
+    async with SessionLocal() as session:
+        profiles = (
+            await session.execute(
+                select(UserProfile.id, UserProfile.telegram_chat_id)
+                .where(UserProfile.telegram_chat_id.is_not(None))
+                .order_by(UserProfile.id)
+                .limit(max_users)
+            )
+        ).all()
+        users = {
+            owner_id: User(owner_id, {"X-Telegram-Init-Data": signed_init_data(int(chat_id), now)})
+            for owner_id, chat_id in profiles
+        }
+        tasks = await session.execute(
+            select(Task.owner_id, Task.id)
+            .where(Task.owner_id.in_(users), Task.is_archived == False)  # noqa: E712
+            .order_by(Task.id)
+        )
+        for owner_id, task_id in tasks.all():
+            users[owner_id].task_ids.append(task_id)
+        dataset = {
+            "users": (await session.execute(select(func.count(UserProfile.id)))).scalar_one(),
+            "tasks": (await session.execute(select(func.count(Task.id)))).scalar_one(),
+            "task_logs": (await session.execute(select(func.count(TaskLog.id)))).scalar_one(),
+        }
+    return [user for user in users.values() if user.task_ids], dataset
+
+
+async def run(args: argparse.Namespace, db: Path) -> dict:
+    # Settings are read when the app is imported, so configure the environment first.
+    os.environ.update(
+        SQLITE_PATH=str(db),
+        TELEGRAM_BOT_TOKEN="",
+        XAI_API_KEY="bench",
+        OPENAI_API_KEY="bench",
+        GOOGLE_API_KEY="bench",
+        LLM_CACHE_BACKEND="memory",
+    )
+    from app import auth
+    from app.config import settings
+    from bench.auth_verify import TOKEN, signed_init_data
+    from app.main import app, lifespan
+    from app.routers import banana
+    from app.services.llm_client import llm_client
+
+    logging.getLogger().setLevel(logging.WARNING)
+    auth.verifier = auth.InitDataVerifier(
+        TOKEN,
+        max_age=settings.telegram_auth_max_age,
+        cache_size=settings.telegram_auth_cache_size,
+        cache_ttl=settings.telegram_auth_cache_ttl,
+    )
+    mock = MockLLM(latency=args.llm_latency, jitter=args.llm_jitter)
+    await llm_client.start(transport=httpx.ASGITransport(app=mock.app))
+    banana._model = MockGeminiModel(mock)
+
+    results = {}
+    async with lifespan(app):
+        users, dataset = await _load_users(args.users)
+        if not users:
+            raise SystemExit("No seeded users with tasks; run `python -m bench.seed` first")
+        ctx = Context(users=users, image=_jpeg())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for name in args.scenarios:
+                request = SCENARIOS[name]
+                if args.warmup:
+                    await run_scenario(client, ctx, request, args.warmup, args.concurrency, offset=10**9)
+                results[name] = await run_scenario(client, ctx, request, args.requests, args.concurrency)
+                print(f"{name:<26} {results[name]['rps']:>9.1f} req/s  p95 {results[name]['p95_ms']:>8.1f} ms", flush=True)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {"db": str(args.db), **dataset, "active_users": len(users)},
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "llm_latency": args.llm_latency,
+            "llm_jitter": args.llm_jitter,
+            "sqlite_profile": settings.sqlite_profile,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, default=Path(__file__).parent / "data" / "small.db")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="recorded requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1000, help="seeded users the clients act as")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS), metavar="SCENARIO",
+        help=f"subset of: {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument("--out", type=Path, help="write the JSON report here")
+    args = parser.parse_args()
+    if not args.db.is_file():
+        raise SystemExit(f"{args.db} not found; run `python -m bench.seed` first")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "bench.db"
+        shutil.copy(args.db, db)
+        report = asyncio.run(run(args, db))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Local stand-in for the xAI/OpenAI and Gemini APIs with configurable latency.
+
+``MockLLM.app`` serves the OpenAI-compatible ``POST /v1/chat/completions``
+used by ``llm_client`` (plain, and ``stream: true`` with ``usage`` in a
+final chunk when ``stream_options.include_usage`` is set).
+The load driver mounts it in-process through ``httpx.ASGITransport``. It
+can also run as a server for the real app::
+
+    python -m bench.mock_llm --port 8900 --latency 0.3
+    XAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_BASE_URL=http://127.0.0.1:8900/v1 uvicorn app.main:app
+
+Gemini is called through the google-generativeai SDK (gRPC), so it is
+replaced in-process by :class:`MockGeminiModel` instead.
+
+Each call waits ``latency`` seconds, varied by +/- ``jitter`` (a fraction).
+Streams spend that time before the first token and then send one chunk
+every ``chunk_interval`` seconds.
+"""
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+JSON_REPLY = {
+    "title": "Mock task",
+    "niche_suggested": "Work",
+    "is_recurring": False,
+    "subtasks": [{"title": f"Mock step {n}", "niche": "Work"} for n in range(1, 4)],
+    "summary": "Mock summary.",
+    "grade": "A",
+}
+TEXT_REPLY = "1. Mock hook one\n2. Mock hook two\n3. Mock hook three"
+
+
+class MockLLM:
+    def __init__(self, latency: float = 0.2, jitter: float = 0.2, chunk_interval: float = 0.005) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_interval = chunk_interval
+        self.calls = 0
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self._chat)
+
+    async def delay(self) -> None:
+        await asyncio.sleep(max(0.0, random.uniform(1 - self.jitter, 1 + self.jitter) * self.latency))
+
+    async def _chat(self, request: Request):
+        payload = await request.json()
+        self.calls += 1
+        system = " ".join(m.get("content", "") for m in payload.get("messages", []) if m.get("role") == "system")
+        content = json.dumps(JSON_REPLY) if "JSON" in system else TEXT_REPLY
+        usage = {"prompt_tokens": 120, "completion_tokens": len(content) // 4}
+        await self.delay()
+        if not payload.get("stream"):
+            return JSONResponse(
+                {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}], "usage": usage}
+            )
+
+        async def chunks():
+            words = content.split(" ")
+            for index, word in enumerate(words):
+                delta = word if index == len(words) - 1 else word + " "
+                yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {'content': delta}}]})}\n\n"
+                await asyncio.sleep(self.chunk_interval)
+            # Like the real APIs, streams only report usage when asked to.
+            if (payload.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+@dataclass
+class _UsageMetadata:
+    prompt_token_count: int = 260
+    candidates_token_count: int = 40
+
+
+@dataclass
+class _GeminiResponse:
+    text: str
+    usage_metadata: _UsageMetadata
+
+
+class MockGeminiModel:
+    """Duck-types ``genai.GenerativeModel.generate_content_async`` for the banana route."""
+
+    def __init__(self, mock: MockLLM) -> None:
+        self.mock = mock
+
+    async def generate_content_async(self, contents, request_options=None) -> _GeminiResponse:
+        self.mock.calls += 1
+        await self.mock.delay()
+        return _GeminiResponse(text="Mock caption.", usage_metadata=_UsageMetadata())
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    args = parser.parse_args()
+    uvicorn.run(MockLLM(args.latency, args.jitter).app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Seeds a SQLite database for the load benchmarks.
+
+Run from ``backend/``::
+
+    python -m bench.seed --scale medium
+    python -m bench.seed --logs 250000 --users 50 --tasks 40 --db bench/data/custom.db
+
+``--scale`` picks 10k (small), 100k (medium) or 1M (large) ``task_logs``
+rows; ``--logs`` overrides it. Each user gets a profile with a Telegram
+chat id (``BASE_CHAT_ID + n``), the starter niches and ``--tasks`` tasks.
+Logs are spread over the last ``--days`` days without repeating a
+(task, day) pair, so every row is one the app could have written. The
+output is deterministic for a given ``--seed``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+
+SCALES = {"small": 10_000, "medium": 100_000, "large": 1_000_000}
+BASE_CHAT_ID = 100_000_000
+CHUNK = 20_000
+STATUSES = ("done",) * 8 + ("missed", "skipped")
+
+
+async def seed(db: Path, users: int, tasks_per_user: int, logs: int, days: int, seed_value: int) -> dict:
+    # The app reads SQLITE_PATH when app.db is first imported.
+    os.environ["SQLITE_PATH"] = str(db)
+    from sqlalchemy import insert, select
+
+    from app.db import DEFAULT_NICHES, SessionLocal, engine, init_db
+    from app.models import Niche, Task, TaskLog, TaskType, UserProfile
+    from app.services import daily_stats
+    from app.services.profile import NEW_PROFILE
+
+    total_tasks = users * tasks_per_user
+    if logs > total_tasks * days:
+        raise SystemExit(f"--logs {logs} exceeds tasks x days ({total_tasks * days}); raise --tasks or --days")
+
+    db.parent.mkdir(parents=True, exist_ok=True)
+    db.unlink(missing_ok=True)
+    rng = random.Random(seed_value)
+    started = time.perf_counter()
+    await init_db()
+    try:
+        async with engine.begin() as conn:
+            owner_ids = list(
+                (
+                    await conn.execute(
+                        insert(UserProfile).returning(UserProfile.id, sort_by_parameter_order=True),
+                        [
+                            {**NEW_PROFILE, "telegram_chat_id": str(BASE_CHAT_ID + n)}
+                            for n in range(users)
+                        ],
+                    )
+                ).scalars()
+            )
+            await conn.execute(
+                insert(Niche), [{"owner_id": owner_id, **values} for owner_id in owner_ids for values in DEFAULT_NICHES]
+            )
+            niches = (await conn.execute(select(Niche.owner_id, Niche.id))).all()
+            niches_by_owner: dict[int, list[int]] = {}
+            for owner_id, niche_id in niches:
+                niches_by_owner.setdefault(owner_id, []).append(niche_id)
+
+            created = datetime.utcnow() - timedelta(days=days)
+            task_rows = []
+            for owner_id in owner_ids:
+                for n in range(tasks_per_user):
+                    recurring = rng.random() < 0.3
+                    scheduled = f"{rng.randrange(6, 23):02d}:{rng.choice((0, 15, 30, 45)):02d}"
+                    task_rows.append(
+                        {
+                            "owner_id": owner_id,
+                            "niche_id": rng.choice(niches_by_owner[owner_id]),
+                            "title": f"Task {n} of user {owner_id}",
+                            "task_type": TaskType.RECURRING if recurring else TaskType.ONE_TIME,
+                            "scheduled_time": scheduled if recurring else None,
+                            "is_archived": rng.random() < 0.1,
+                            "created_at": created + timedelta(minutes=len(task_rows)),
+                        }
+                    )
+            task_ids = list(
+                (
+                    await conn.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), task_rows)
+                ).scalars()
+            )
+            task_owner = [row["owner_id"] for row in task_rows]
+
+            # Distinct (task, day) slots: slot k is task k % T on day k // T.
+            today = date.today()
+            time_of_day = datetime.min.time().replace(hour=20)
+            slots = rng.sample(range(total_tasks * days), logs)
+            for offset in range(0, logs, CHUNK):
+                rows = []
+                for slot in slots[offset:offset + CHUNK]:
+                    index, day = slot % total_tasks, slot // total_tasks
+                    status = rng.choice(STATUSES)
+                    log_date = today - timedelta(days=day)
+                    rows.append(
+                        {
+                            "task_id": task_ids[index],
+                            "owner_id": task_owner[index],
+                            "status": status,
+                            "date": log_date.isoformat(),
+                            "completed_at": datetime.combine(log_date, time_of_day) if status == "done" else None,
+                        }
+                    )
+                await conn.execute(insert(TaskLog), rows)
+
+        async with SessionLocal() as session:
+            stat_rows = await daily_stats.rebuild(session)
+            await session.commit()
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("ANALYZE")
+    finally:
+        await engine.dispose()
+
+    return {
+        "db": str(db),
+        "users": users,
+        "tasks": total_tasks,
+        "task_logs": logs,
+        "daily_stats": stat_rows,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--logs", type=int, help="task_logs rows (overrides --scale)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=50, help="tasks per user")
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", type=Path, help="defaults to bench/data/<scale>.db")
+    args = parser.parse_args()
+
+    logs = args.logs or SCALES[args.scale]
+    name = f"logs{logs}" if args.logs else args.scale
+    db = args.db or Path(__file__).parent / "data" / f"{name}.db"
+    print(json.dumps(asyncio.run(seed(db.resolve(), args.users, args.tasks, logs, args.days, args.seed)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compares SQLite throughput with library defaults vs. the tuned profile.
+
+Run from ``backend/``::
+
+    python -m bench.sqlite_profile --writers 8 --readers 8 --seconds 5
+
+Each writer mimics ``log_task`` (insert a log + bump the profile, then
+commit); each reader mimics the dashboard (the ``get_stats`` COUNTs).
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.db import Base, build_engine
+from app.models import Task, TaskLog, TaskStatus, UserProfile
+
+
+async def _seed(sessionmaker, tasks: int) -> None:
+    async with sessionmaker() as session:
+        session.add(UserProfile(level=1, xp=0, streak=0))
+        session.add_all(Task(owner_id=1, title=f"Task {i}") for i in range(tasks))
+        await session.commit()
+
+
+async def _writer(sessionmaker, deadline: float, tasks: int, counters: dict, worker: int) -> None:
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+        day = (date(2024, 1, 1) + timedelta(days=n % 365)).isoformat()
+        try:
+            async with sessionmaker() as session:
+                session.add(TaskLog(task_id=(worker * 7919 + n) % tasks + 1, owner_id=1, status=TaskStatus.DONE, date=day))
+                await session.execute(update(UserProfile).values(xp=UserProfile.xp + 10))
+                await session.commit()
+            counters["writes"] += 1
+        except OperationalError:
+            counters["locked"] += 1
+
+
+async def _reader(sessionmaker, deadline: float, counters: dict) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            async with sessionmaker() as session:
+                await session.execute(select(func.count(Task.id)).where(Task.owner_id == 1, Task.is_archived == False))
+                await session.execute(
+                    select(func.count(TaskLog.id)).where(
+                        TaskLog.owner_id == 1, TaskLog.date == "2024-03-01", TaskLog.status == TaskStatus.DONE
+                    )
+                )
+                await session.execute(
+                    select(func.count(TaskLog.id)).where(
+                        TaskLog.owner_id == 1, TaskLog.date >= "2024-02-20", TaskLog.status == TaskStatus.DONE
+                    )
+                )
+            counters["reads"] += 1
+        except OperationalError:
+            counters["locked"] += 1
+
+
+async def run_profile(profile: str, writers: int, readers: int, seconds: float, tasks: int) -> dict:
+    settings.sqlite_profile = profile
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        await _seed(sessionmaker, tasks)
+
+        counters = {"writes": 0, "reads": 0, "locked": 0}
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(
+            *(_writer(sessionmaker, deadline, tasks, counters, i) for i in range(writers)),
+            *(_reader(sessionmaker, deadline, counters) for _ in range(readers)),
+        )
+        await engine.dispose()
+
+    return {
+        "profile": profile,
+        "writes_per_s": round(counters["writes"] / seconds, 1),
+        "reads_per_s": round(counters["reads"] / seconds, 1),
+        "locked_errors": counters["locked"],
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--tasks", type=int, default=500)
+    args = parser.parse_args()
+
+    results = []
+    for profile in ("default", "tuned"):
+        results.append(await run_profile(profile, args.writers, args.readers, args.seconds, args.tasks))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -67,7 +67,6 @@ import {
   type TaskItem,
   resetSystem,
   getProfile,
-  updateProfile,
   type UserProfile,
   deleteTask,
   updateTask,
@@ -158,10 +157,9 @@ const TRANSLATIONS = {
     // Telegram
     telegram: "Telegram Интеграция",
     chatId: "Ваш Chat ID",
-    chatIdPlaceholder: "Введите ID (напр. 12345678)",
     save: "Сохранить",
     saved: "Сохранено!",
-    telegramDesc: "Запустите бота @... и введите ID здесь."
+    telegramDesc: "Чат привязывается автоматически, когда вы открываете приложение из Telegram."
   },
   en: {
     // Focus Screen
@@ -234,10 +232,9 @@ const TRANSLATIONS = {
     // Telegram
     telegram: "Telegram Integration",
     chatId: "Your Chat ID",
-    chatIdPlaceholder: "Enter ID (e.g. 12345678)",
     save: "Save",
     saved: "Saved!",
-    telegramDesc: "Start bot @... and enter ID here."
+    telegramDesc: "Your chat is linked automatically when you open the app from Telegram."
   }
 };
 
@@ -1131,45 +1128,19 @@ function ShopScreen({ profile, setProfile, lang }: { profile: UserProfile; setPr
   );
 }
 
-function SettingsScreen({ theme, toggleTheme, lang, setLang, profile, setProfile }: { theme: 'dark' | 'light', toggleTheme: () => void, lang: Lang, setLang: (l: Lang) => void, profile: UserProfile, setProfile: (p: UserProfile) => void }) {
+function SettingsScreen({ theme, toggleTheme, lang, setLang, profile }: { theme: 'dark' | 'light', toggleTheme: () => void, lang: Lang, setLang: (l: Lang) => void, profile: UserProfile }) {
   const [niches, setNiches] = useState<NicheItem[]>([]);
   const [nicheName, setNicheName] = useState("");
   const [nicheColor, setNicheColor] = useState(PRESET_COLORS[7]); // Indigo default
   const [loading, setLoading] = useState(false);
   const [success, setSuccess] = useState(false);
 
-  // Telegram state
-  const [telegramId, setTelegramId] = useState(profile.telegram_chat_id || "");
-  const [savingTg, setSavingTg] = useState(false);
-  const [tgSuccess, setTgSuccess] = useState(false);
-  
   const t = TRANSLATIONS[lang];
 
   useEffect(() => {
     listNiches().then(setNiches);
   }, []);
 
-  useEffect(() => {
-    if (profile.telegram_chat_id) {
-        setTelegramId(profile.telegram_chat_id);
-    }
-  }, [profile.telegram_chat_id]);
-
-  const handleSaveTelegram = async () => {
-    if (!telegramId.trim()) return;
-    setSavingTg(true);
-    try {
-        const updated = await updateProfile({ telegram_chat_id: telegramId });
-        setProfile(updated);
-        setTgSuccess(true);
-        setTimeout(() => setTgSuccess(false), 2000);
-    } catch (e) {
-        console.error("Failed to save Telegram ID", e);
-    } finally {
-        setSavingTg(false);
-    }
-  };
-
   const handleCreateNiche = async () => {
     if (!nicheName.trim()) return;
     setLoading(true);
@@ -1286,30 +1257,11 @@ function SettingsScreen({ theme, toggleTheme, lang, setLang, profile, setProfile
         
         <p className="text-xs text-gray-500 dark:text-white/40">{t.telegramDesc}</p>
 
-        <div className="flex gap-2">
-            <input
-              value={telegramId}
-              onChange={e => setTelegramId(e.target.value)}
-              placeholder={t.chatIdPlaceholder}
-              className="flex-1 bg-gray-50 dark:bg-white/[0.03] border border-gray-200 dark:border-white/10 rounded-xl px-4 py-3 text-gray-900 dark:text-white outline-none focus:border-blue-500/50 transition-colors"
-            />
-             <button
-            onClick={handleSaveTelegram}
-            disabled={!telegramId.trim() || savingTg}
-            className={cn(
-              "px-6 rounded-xl text-sm font-bold text-white shadow-lg transition-all active:scale-95 flex items-center justify-center gap-2",
-              tgSuccess ? "bg-green-500 shadow-green-500/25" : "bg-blue-500 hover:bg-blue-600 shadow-blue-500/25"
-            )}
-          >
-            {savingTg ? (
-              <div className="w-5 h-5 border-2 border-white/30 border-t-white rounded-full animate-spin" />
-            ) : tgSuccess ? (
-              <CheckCircle2 size={18} />
-            ) : (
-              t.save
-            )}
-          </button>
-        </div>
+        <input
+          value={profile.telegram_chat_id || "—"}
+          readOnly
+          className="w-full bg-gray-50 dark:bg-white/[0.03] border border-gray-200 dark:border-white/10 rounded-xl px-4 py-3 text-gray-900 dark:text-white outline-none"
+        />
       </div>
 
       <div className="bg-white dark:bg-[#0A0A0A] border border-gray-200 dark:border-white/[0.08] rounded-3xl p-6 space-y-6 shadow-sm dark:shadow-none">
@@ -1600,7 +1552,7 @@ function App() {
             {tab === "focus" && <FocusScreen lang={lang} />}
             {tab === "shop" && <ShopScreen profile={profile} setProfile={setProfile} lang={lang} />}
             {tab === "lab" && <NanoBanana lang={lang} />}
-            {tab === "settings" && <SettingsScreen theme={theme} toggleTheme={toggleTheme} lang={lang} setLang={setLang} profile={profile} setProfile={setProfile} />}
+            {tab === "settings" && <SettingsScreen theme={theme} toggleTheme={toggleTheme} lang={lang} setLang={setLang} profile={profile} />}
           </motion.div>
         </AnimatePresence>
       </main>
@@ -1,3 +1,5 @@
+import { getTelegram } from "./telegram";
+
 const RAW_BASE = import.meta.env.VITE_API_BASE_URL;
 const FALLBACK_BASE = import.meta.env.DEV ? "/api" : "";
 const RESOLVED_BASE = (RAW_BASE && RAW_BASE.length > 0 ? RAW_BASE : FALLBACK_BASE) || "";
@@ -7,12 +9,19 @@ const API_BASE = RESOLVED_BASE.endsWith("/") && RESOLVED_BASE.length > 1
 
 type RequestOptions = Omit<RequestInit, "body"> & { body?: unknown };
 
+// Signed Telegram launch data; the backend resolves the calling user from it.
+function authHeaders(): Record<string, string> {
+  const initData = getTelegram()?.initData;
+  return initData ? { "X-Telegram-Init-Data": initData } : {};
+}
+
 async function request<T>(path: string, options: RequestOptions = {}): Promise<T> {
   const response = await fetch(`${API_BASE}${path}`, {
     ...options,
     headers: {
       "Content-Type": "application/json",
       "ngrok-skip-browser-warning": "true",
+      ...authHeaders(),
       ...(options.headers || {})
     },
     body: options.body ? JSON.stringify(options.body) : undefined
@@ -50,7 +59,9 @@ export type TaskItem = {
 
 // ... Legacy Types ...
 export type WindowItem = {
+  window_id?: number;
   label: string;
+  platform?: string | null;
   start: string;
   end: string;
   alert_at: string;
@@ -114,6 +125,9 @@ export type StatsResponse = {
   total_active_today: number;
   completion_rate_today: number;
   completed_last_7_days: number;
+  completed_last_30_days?: number;
+  completed_last_90_days?: number;
+  completed_last_365_days?: number;
   streak: number;
 };
 
@@ -126,7 +140,7 @@ export async function getProfile(): Promise<UserProfile> {
   return request("/tasks/profile");
 }
 
-export async function updateProfile(data: { xp?: number; inventory?: string; achievements?: string; telegram_chat_id?: string }): Promise<UserProfile> {
+export async function updateProfile(data: { xp?: number; inventory?: string; achievements?: string }): Promise<UserProfile> {
   return request("/tasks/profile", { method: "PATCH", body: data });
 }
 
@@ -190,10 +204,18 @@ export async function logTask(taskId: number, status: string, note?: string): Pr
   return request(`/tasks/${taskId}/log?${query.toString()}`, { method: "POST" });
 }
 
+export async function logTasksBatch(entries: { task_id: number; status: string; note?: string }[]): Promise<{ results: { task_id: number; status: string }[]; profile?: UserProfile }> {
+  return request("/tasks/log/batch", { method: "POST", body: { entries } });
+}
+
 // ... Legacy Endpoints ...
 
-export async function getWindows(): Promise<{ timezone: string; windows: WindowItem[] }> {
-  return request("/scheduler/windows");
+export async function getWindows(days?: number, limit?: number): Promise<{ timezone: string; windows: WindowItem[] }> {
+  const params = new URLSearchParams();
+  if (days) params.set("days", String(days));
+  if (limit) params.set("limit", String(limit));
+  const query = params.toString() ? `?${params}` : "";
+  return request(`/scheduler/windows${query}`);
 }
 
 export async function notifyWindow(deepLink?: string): Promise<{ sent: boolean; window: WindowItem }> {
@@ -237,6 +259,7 @@ export async function bananaMagic(file: File, mode: string): Promise<{ result: s
   
   const response = await fetch(`${API_BASE}/banana/magic`, {
     method: "POST",
+    headers: authHeaders(),
     body: formData,
     // Note: Do NOT set Content-Type header manually for FormData, browser does it with boundary
   });
@@ -255,6 +278,7 @@ export async function bananaFaceswap(file: File): Promise<{ result: string }> {
   
   const response = await fetch(`${API_BASE}/banana/faceswap`, {
     method: "POST",
+    headers: authHeaders(),
     body: formData,
   });
   
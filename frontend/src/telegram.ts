@@ -24,6 +24,7 @@ export type TelegramWebApp = {
     offClick: (handler: () => void) => void;
   };
   colorScheme?: string;
+  initData?: string;
   initDataUnsafe?: {
     user?: TelegramUser;
   };